@@ -0,0 +1,123 @@
+"""
+Shared audio loading for the quality analyzer and refinement processor.
+Decodes straight to mono float32 with soundfile, skipping librosa's load wrapper,
+offloads STFTs to CUDA via torch when a GPU is available, and plans CPU FFTs
+with pyFFTW when it is installed. Long files can be read and processed in
+hop-aligned chunks so peak memory doesn't grow with file length.
+"""
+
+import functools
+
+import librosa
+import numpy as np
+import scipy.fft
+import soundfile as sf
+
+# librosa computes its STFTs through scipy.fft; when pyFFTW is installed,
+# route them through it and keep the plans for our fixed transform sizes
+# cached between calls instead of re-planning per file
+try:
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft
+except ImportError:
+    pyfftw = None
+else:
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60)
+    scipy.fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+
+# Samples per chunk when streaming; a multiple of every hop length used here
+STREAM_BLOCK_SIZE = 2 ** 20
+
+
+def load_audio(path):
+    """Load an audio file as mono float32 samples at its native sample rate."""
+    try:
+        y, sr = sf.read(str(path), dtype='float32', always_2d=False)
+    except RuntimeError:
+        # Formats libsndfile cannot decode (e.g. m4a) go through librosa
+        return librosa.load(str(path), sr=None, mono=True)
+    
+    if y.ndim > 1:
+        y = y.mean(axis=1, dtype=np.float32)
+    return y, sr
+
+
+class AudioReader:
+    """Random-access mono float32 reads without decoding the whole file up front.
+    
+    Formats libsndfile can't read are decoded in full with load_audio instead.
+    """
+    
+    def __init__(self, path):
+        try:
+            self._file = sf.SoundFile(str(path))
+        except RuntimeError:
+            self._file = None
+            self._samples, self.samplerate = load_audio(path)
+            self.frames = len(self._samples)
+        else:
+            self._samples = None
+            self.samplerate = self._file.samplerate
+            self.frames = self._file.frames
+    
+    def read(self, start, stop):
+        """Samples [start, stop) as a contiguous mono float32 array."""
+        if self._file is None:
+            return self._samples[start:stop]
+        
+        self._file.seek(start)
+        y = self._file.read(stop - start, dtype='float32', always_2d=True)
+        if y.shape[1] > 1:
+            return y.mean(axis=1, dtype=np.float32)
+        return np.ascontiguousarray(y[:, 0])
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_chunks(num_samples, margin, block_size=STREAM_BLOCK_SIZE):
+    """Yield (start, stop, padded_start, padded_stop) covering num_samples.
+    
+    [start, stop) tile the signal in block_size steps; the padded range adds
+    up to `margin` samples of context on each side. With block_size and
+    margin multiples of the hop and margin >= n_fft, STFT frames centred in
+    [start, stop) see exactly the samples a whole-signal STFT would.
+    """
+    for start in range(0, num_samples, block_size):
+        stop = min(start + block_size, num_samples)
+        yield start, stop, max(0, start - margin), min(num_samples, stop + margin)
+
+
+@functools.lru_cache(maxsize=None)
+def cuda_available():
+    """Return True when torch is installed and a CUDA device is usable."""
+    try:
+        import torch
+    except ImportError:
+        return False
+    return torch.cuda.is_available()
+
+
+def stft_magnitude(y, n_fft=2048, hop_length=512):
+    """Magnitude spectrogram matching librosa.stft defaults, on GPU when available.
+    
+    y may be batched as (..., n_samples); the spectrogram keeps the leading axes.
+    """
+    if cuda_available():
+        import torch
+        
+        y_t = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32)).cuda()
+        window = torch.hann_window(n_fft, device=y_t.device)
+        stft = torch.stft(y_t, n_fft=n_fft, hop_length=hop_length, window=window,
+                          center=True, pad_mode='constant', return_complex=True)
+        return stft.abs().cpu().numpy()
+    
+    return np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
@@ -0,0 +1,163 @@
+"""
+Numba-compiled kernels for per-frame audio metrics.
+The quality analyzer reads the signal once in hop-sized blocks; overlapping
+frame statistics are then assembled from the block statistics, so chunks can
+be processed separately. The emotion benchmark uses the YIN pitch tracker.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+# Samples with magnitude at or below this count as zero (librosa's convention)
+ZERO_THRESHOLD = 1e-10
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def block_stats(y, hop_length):
+    """Per-block energy, internal zero crossings and first/last sample sign.
+
+    Trailing samples that don't fill a whole block are ignored, matching
+    uncentered framing.
+    """
+    n_blocks = len(y) // hop_length
+    energy = np.empty(n_blocks, dtype=np.float64)
+    crossings = np.empty(n_blocks, dtype=np.int64)
+    first_neg = np.empty(n_blocks, dtype=np.bool_)
+    last_neg = np.empty(n_blocks, dtype=np.bool_)
+
+    for b in prange(n_blocks):
+        start = b * hop_length
+        acc = 0.0
+        count = 0
+        prev_neg = y[start] < -ZERO_THRESHOLD
+        first_neg[b] = prev_neg
+        for i in range(start, start + hop_length):
+            x = y[i]
+            acc += x * x
+            neg = x < -ZERO_THRESHOLD
+            if neg != prev_neg:
+                count += 1
+            prev_neg = neg
+        energy[b] = acc
+        crossings[b] = count
+        last_neg[b] = prev_neg
+
+    return energy, crossings, first_neg, last_neg
+
+
+@njit(fastmath=True, cache=True)
+def frame_metrics(energy, crossings, first_neg, last_neg, frame_length, hop_length, sr, duration):
+    """Reduce block statistics to the analyzer's frame-level metrics.
+
+    Returns (rms_mean, rms_std, zcr_mean, zcr_std, snr_estimate,
+    silence_ratio, effective_duration).
+    """
+    blocks_per_frame = frame_length // hop_length
+    n_frames = len(energy) - blocks_per_frame + 1
+    if n_frames <= 0:
+        raise ValueError("Audio is shorter than one analysis frame")
+
+    frame_energy = np.empty(n_frames, dtype=np.float64)
+    zcr = np.empty(n_frames, dtype=np.float64)
+    for f in range(n_frames):
+        e = 0.0
+        c = 0
+        for b in range(f, f + blocks_per_frame):
+            e += energy[b]
+            c += crossings[b]
+            # Crossing between this block and the previous one inside the frame
+            if b > f and first_neg[b] != last_neg[b - 1]:
+                c += 1
+        frame_energy[f] = e
+        zcr[f] = c / frame_length
+
+    rms = np.sqrt(frame_energy / frame_length)
+
+    # Noise floor from the quietest 10% of frames
+    noise_floor = np.percentile(rms, 10)
+    speech = rms[rms > noise_floor * 2]
+    snr = 0.0
+    if len(speech) > 0:
+        snr = np.mean(speech) / (noise_floor + 1e-10)
+
+    # Leading/trailing silence from the bottom 20% of frame energies
+    energy_threshold = np.percentile(frame_energy, 20)
+    first = -1
+    last = -1
+    for f in range(n_frames):
+        if frame_energy[f] > energy_threshold:
+            if first < 0:
+                first = f
+            last = f
+
+    if first < 0:
+        effective_duration = 0.0
+        silence_ratio = 1.0
+    else:
+        effective_duration = (last + 1 - first) * hop_length / sr
+        silence_ratio = 1.0 - effective_duration / duration
+
+    return (np.mean(rms), np.std(rms), np.mean(zcr), np.std(zcr),
+            snr, silence_ratio, effective_duration)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def yin_pitch(y, sr, fmin, fmax, frame_length=2048, hop_length=512, threshold=0.1):
+    """YIN F0 track with centered framing (same frame grid as librosa.pyin).
+
+    Returns (f0, voiced_flag); f0 is NaN where no period clears the
+    threshold on the cumulative-mean-normalized difference function.
+    """
+    min_period = max(1, int(np.floor(sr / fmax)))
+    max_period = min(int(np.ceil(sr / fmin)), frame_length // 2)
+    window = frame_length - max_period
+
+    pad = frame_length // 2
+    # The difference function reads up to start + window + max_period + 1 =
+    # start + frame_length, and the last frame starts at len(y) when len(y) is a
+    # multiple of hop_length, so keep one extra zero past the centered padding
+    padded = np.zeros(len(y) + 2 * pad + 1, dtype=np.float64)
+    padded[pad:pad + len(y)] = y
+    n_frames = 1 + len(y) // hop_length
+
+    f0 = np.full(n_frames, np.nan)
+    voiced = np.zeros(n_frames, dtype=np.bool_)
+
+    for f in prange(n_frames):
+        start = f * hop_length
+        cmnd = np.ones(max_period + 2)
+        running = 0.0
+        for tau in range(1, max_period + 2):
+            d = 0.0
+            for j in range(start, start + window):
+                diff = padded[j] - padded[j + tau]
+                d += diff * diff
+            running += d
+            if running > 0.0:
+                cmnd[tau] = d * tau / running
+
+        # First dip below the threshold, followed down to its local minimum
+        best = -1
+        tau = min_period
+        while tau <= max_period:
+            if cmnd[tau] < threshold:
+                while tau + 1 <= max_period and cmnd[tau + 1] < cmnd[tau]:
+                    tau += 1
+                best = tau
+                break
+            tau += 1
+        if best < 0:
+            continue
+
+        # Parabolic interpolation of the trough for sub-sample precision
+        period = float(best)
+        a = cmnd[best - 1]
+        b = cmnd[best]
+        c = cmnd[best + 1]
+        denom = a - 2.0 * b + c
+        if denom > 0.0:
+            period += 0.5 * (a - c) / denom
+        f0[f] = sr / period
+        voiced[f] = True
+
+    return f0, voiced
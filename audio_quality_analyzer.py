@@ -12,10 +12,19 @@ import time
 from pathlib import Path
 from datetime import datetime
 import json
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 
-# Configure extensive logging
+import librosa
+import numpy as np
+import soundfile as sf
+
+from audio_io import AudioReader, iter_chunks, stft_magnitude
+from audio_kernels import block_stats, frame_metrics
+
+# Configure logging (set TTS_LOG_LEVEL=DEBUG for per-file detail)
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get("TTS_LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s | %(levelname)-8s | [%(filename)s:%(lineno)d] | %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
@@ -27,26 +36,134 @@ try:
 except Exception:
     pass
 
+# Composite quality score tables: each metric maps into one of 4 bands worth
+# 5-25 points. Thresholds are ascending; searchsorted's side encodes whether
+# a band boundary is inclusive (>=, <) or exclusive (>, <=).
+DURATION_THRESHOLDS = np.array([3.0, 5.0, 10.0])      # duration >= t
+DURATION_SCORES = np.array([5, 15, 20, 25])
+SNR_THRESHOLDS = np.array([5.0, 10.0, 20.0])          # snr > t
+SNR_SCORES = np.array([5, 15, 20, 25])
+HNR_THRESHOLDS = np.array([3.0, 10.0])                # hnr > t
+HNR_SCORES = np.array([10, 20, 25])
+SILENCE_THRESHOLDS = np.array([0.1, 0.3, 0.5])        # silence < t
+SILENCE_SCORES = np.array([25, 20, 15, 5])
+
+
+def quality_score_from_metrics(duration, snr, hnr, silence_ratio):
+    """Composite 0-100 quality score; accepts scalars or equal-length arrays."""
+    return (DURATION_SCORES[np.searchsorted(DURATION_THRESHOLDS, duration, side='right')]
+            + SNR_SCORES[np.searchsorted(SNR_THRESHOLDS, snr, side='left')]
+            + HNR_SCORES[np.searchsorted(HNR_THRESHOLDS, hnr, side='left')]
+            + SILENCE_SCORES[np.searchsorted(SILENCE_THRESHOLDS, silence_ratio, side='right')])
+
+
 class AudioQualityAnalyzer:
     """Comprehensive audio quality analysis for voice cloning."""
     
-    def __init__(self, audio_dir="audio_samples"):
+    def __init__(self, audio_dir="audio_samples", max_workers=None):
         self.audio_dir = Path(audio_dir)
+        self.max_workers = max_workers or os.cpu_count()
         self.results = []
+        self.results_arr = None
+        
+    def _build_results_array(self):
+        """Columnar view of the fields filter_high_quality tests, one row per result."""
+        self.results_arr = np.rec.fromarrays(
+            [
+                np.array([r['quality_score'] for r in self.results], dtype=np.float64),
+                np.array([r['duration'] for r in self.results], dtype=np.float64),
+                np.array([r['silence_ratio'] for r in self.results], dtype=np.float64),
+            ],
+            names='quality_score,duration,silence_ratio',
+        )
+        return self.results_arr
+    
+    def _score_results(self):
+        """Fill in quality_score for every result from its raw metrics."""
+        if not self.results:
+            return
+        scores = quality_score_from_metrics(
+            np.array([r['duration'] for r in self.results]),
+            np.array([r['snr_estimate'] for r in self.results]),
+            np.array([r['harmonic_noise_ratio'] for r in self.results]),
+            np.array([r['silence_ratio'] for r in self.results]),
+        )
+        for result, score in zip(self.results, scores):
+            result['quality_score'] = float(score)
+            logger.info(f"    ✅ {result['filename']}: Quality Score {score:.1f}/100")
+    
+    @staticmethod
+    def _prefilter(audio_paths, min_duration=2.0, min_sample_rate=16000):
+        """Skip files whose header shows them too short or too low-rate to be useful."""
+        kept = []
+        for path in audio_paths:
+            try:
+                info = sf.info(str(path))
+            except RuntimeError:
+                # libsndfile can't read this header (e.g. m4a); let analysis decide
+                kept.append(path)
+                continue
+            
+            if info.duration >= min_duration and info.samplerate >= min_sample_rate:
+                kept.append(path)
+            else:
+                logger.debug("    Skipping %s: %.2fs at %d Hz", Path(path).name, info.duration, info.samplerate)
+        return kept
+    
+    @staticmethod
+    def _stream_features(reader, frame_length=2048, hop_length=512):
+        """Accumulate frame-level and spectral statistics chunk by chunk.
+        
+        Only one chunk of samples and its spectrogram are held at a time.
+        Per-block kernel statistics are small (one row per hop), so they are
+        kept whole and the percentile-based metrics stay exact.
+        """
+        n, sr = reader.frames, reader.samplerate
+        n_frames = 1 + n // hop_length  # centred STFT frames of the whole signal
+        
+        blocks = []
+        centroid_sum = rolloff_sum = bandwidth_sum = 0.0
+        flatness_sum = weight_sum = 0.0
+        for start, stop, pad_start, pad_stop in iter_chunks(n, margin=frame_length):
+            segment = reader.read(pad_start, pad_stop)
+            blocks.append(block_stats(segment[start - pad_start:stop - pad_start], hop_length))
+            
+            # Keep the spectrogram frames centred inside [start, stop)
+            first = start // hop_length - pad_start // hop_length
+            last = (n_frames if stop == n else stop // hop_length) - pad_start // hop_length
+            S = stft_magnitude(segment, n_fft=frame_length, hop_length=hop_length)[:, first:last]
+            
+            centroid = librosa.feature.spectral_centroid(S=S, sr=sr)[0]
+            centroid_sum += float(np.sum(centroid))
+            rolloff_sum += float(np.sum(librosa.feature.spectral_rolloff(S=S, sr=sr)[0]))
+            bandwidth_sum += float(np.sum(librosa.feature.spectral_bandwidth(S=S, sr=sr, centroid=centroid[np.newaxis])[0]))
+            
+            # Energy-weighted flatness for the harmonicity estimate
+            flatness = librosa.feature.spectral_flatness(S=S)[0]
+            frame_weights = np.sum(S ** 2, axis=0) + 1e-10
+            flatness_sum += float(np.sum(flatness * frame_weights))
+            weight_sum += float(np.sum(frame_weights))
         
-    def analyze_audio_file(self, audio_path):
+        energy, crossings, first_neg, last_neg = (np.concatenate(parts) for parts in zip(*blocks))
+        frame_stats = frame_metrics(energy, crossings, first_neg, last_neg,
+                                    frame_length, hop_length, sr, n / sr)
+        spectral_stats = (centroid_sum / n_frames, rolloff_sum / n_frames,
+                          bandwidth_sum / n_frames, flatness_sum / weight_sum)
+        return frame_stats, spectral_stats
+    
+    @staticmethod
+    def analyze_audio_file(audio_path):
         """Analyze a single audio file with multiple quality metrics."""
         logger.info(f"  → Analyzing: {Path(audio_path).name}")
         
         try:
-            import librosa
-            import numpy as np
-            import soundfile as sf
-            
-            # Load audio
-            logger.debug(f"    Loading audio file...")
-            y, sr = librosa.load(str(audio_path), sr=None, mono=True)
-            duration = len(y) / sr
+            # Open audio; samples are streamed in chunks below
+            logger.debug("    Opening audio file...")
+            with AudioReader(audio_path) as reader:
+                sr = reader.samplerate
+                num_samples = reader.frames
+                (frame_stats, spectral_stats) = AudioQualityAnalyzer._stream_features(reader)
+            duration = num_samples / sr
             file_size = Path(audio_path).stat().st_size
             
             # Basic metrics
@@ -56,146 +173,76 @@ class AudioQualityAnalyzer:
                 "sample_rate": int(sr),
                 "duration": float(duration),
                 "file_size_mb": float(file_size / (1024 * 1024)),
-                "num_samples": len(y),
+                "num_samples": int(num_samples),
             }
             
-            logger.debug(f"    Sample rate: {sr} Hz, Duration: {duration:.2f}s, Size: {file_size/(1024*1024):.2f} MB")
+            logger.debug("    Sample rate: %d Hz, Duration: %.2fs, Size: %.2f MB", sr, duration, file_size / (1024 * 1024))
             
             # Quality Layer 1: Signal Quality Metrics
-            logger.debug(f"    Computing signal quality metrics...")
+            logger.debug("    Computing signal quality metrics...")
+            
+            # One JIT-compiled pass over the samples yields every frame-level
+            # metric: RMS, zero crossings, noise floor and speech boundaries
+            (rms_mean, rms_std, zcr_mean, zcr_std,
+             snr_estimate, silence_ratio, effective_duration) = frame_stats
+            (centroid_mean, rolloff_mean, bandwidth_mean, mean_flatness) = spectral_stats
             
             # RMS Energy (overall loudness)
-            rms = librosa.feature.rms(y=y)[0]
-            metrics["rms_mean"] = float(np.mean(rms))
-            metrics["rms_std"] = float(np.std(rms))
+            metrics["rms_mean"] = float(rms_mean)
+            metrics["rms_std"] = float(rms_std)
             
             # Zero Crossing Rate (indicates speech vs noise)
-            zcr = librosa.feature.zero_crossing_rate(y)[0]
-            metrics["zcr_mean"] = float(np.mean(zcr))
-            metrics["zcr_std"] = float(np.std(zcr))
+            metrics["zcr_mean"] = float(zcr_mean)
+            metrics["zcr_std"] = float(zcr_std)
             
             # Spectral Centroid (brightness of sound)
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            metrics["spectral_centroid_mean"] = float(np.mean(spectral_centroids))
+            metrics["spectral_centroid_mean"] = float(centroid_mean)
             
             # Quality Layer 2: Noise Assessment
-            logger.debug(f"    Assessing noise levels...")
-            
-            # Estimate noise floor (using quiet segments)
-            energy_threshold = np.percentile(rms, 10)  # Bottom 10% as noise estimate
-            speech_energy = rms[rms > energy_threshold * 2]
+            logger.debug("    Assessing noise levels...")
             
-            if len(speech_energy) > 0:
-                snr_estimate = np.mean(speech_energy) / (energy_threshold + 1e-10)
-                metrics["snr_estimate"] = float(snr_estimate)
-            else:
-                metrics["snr_estimate"] = 0.0
+            # Estimate noise floor (bottom 10% of frames as noise estimate)
+            metrics["snr_estimate"] = float(snr_estimate)
             
             # Quality Layer 3: Speech Characteristics
-            logger.debug(f"    Analyzing speech characteristics...")
+            logger.debug("    Analyzing speech characteristics...")
             
             # Spectral Rolloff (frequency content)
-            rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-            metrics["spectral_rolloff_mean"] = float(np.mean(rolloff))
+            metrics["spectral_rolloff_mean"] = float(rolloff_mean)
             
             # Bandwidth (spectral spread)
-            bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
-            metrics["spectral_bandwidth_mean"] = float(np.mean(bandwidth))
+            metrics["spectral_bandwidth_mean"] = float(bandwidth_mean)
             
             # Quality Layer 4: Clarity Metrics
-            logger.debug(f"    Computing clarity metrics...")
+            logger.debug("    Computing clarity metrics...")
             
-            # Harmonic-to-noise ratio (rough estimate)
-            try:
-                y_harmonic, y_percussive = librosa.effects.hpss(y)
-                harmonic_energy = np.sum(y_harmonic ** 2)
-                percussive_energy = np.sum(y_percussive ** 2)
-                hnr = harmonic_energy / (percussive_energy + 1e-10)
-                metrics["harmonic_noise_ratio"] = float(hnr)
-            except:
-                metrics["harmonic_noise_ratio"] = 1.0
+            # Harmonic-to-noise ratio (rough estimate): inverse spectral
+            # flatness, energy-weighted so quiet pauses don't dominate.
+            # ~1-2 for white noise, well above 10 for clean voiced audio.
+            metrics["harmonic_noise_ratio"] = float(1.0 / (mean_flatness + 1e-6))
             
             # Quality Layer 5: Duration and Completeness
-            logger.debug(f"    Checking duration and completeness...")
+            logger.debug("    Checking duration and completeness...")
             
             # Check for silence at start/end
-            frame_length = 2048
-            hop_length = 512
-            frames = librosa.util.frame(y, frame_length=frame_length, hop_length=hop_length)
-            frame_energy = np.sum(frames ** 2, axis=0)
-            
-            # Find speech segments
-            energy_threshold = np.percentile(frame_energy, 20)
-            speech_frames = frame_energy > energy_threshold
-            
-            if np.any(speech_frames):
-                speech_start = np.argmax(speech_frames) * hop_length / sr
-                speech_end = (len(speech_frames) - np.argmax(speech_frames[::-1])) * hop_length / sr
-                effective_duration = speech_end - speech_start
-                metrics["effective_duration"] = float(effective_duration)
-                metrics["silence_ratio"] = float(1.0 - (effective_duration / duration))
-            else:
-                metrics["effective_duration"] = 0.0
-                metrics["silence_ratio"] = 1.0
-            
-            # Quality Layer 6: Overall Quality Score
-            logger.debug(f"    Computing overall quality score...")
-            
-            # Calculate composite quality score (0-100)
-            quality_score = 0.0
-            
-            # Duration score (0-25 points)
-            if duration >= 10:
-                quality_score += 25
-            elif duration >= 5:
-                quality_score += 20
-            elif duration >= 3:
-                quality_score += 15
-            else:
-                quality_score += 5
-            
-            # SNR score (0-25 points)
-            if metrics["snr_estimate"] > 20:
-                quality_score += 25
-            elif metrics["snr_estimate"] > 10:
-                quality_score += 20
-            elif metrics["snr_estimate"] > 5:
-                quality_score += 15
-            else:
-                quality_score += 5
-            
-            # Clarity score (0-25 points)
-            if metrics["harmonic_noise_ratio"] > 2.0:
-                quality_score += 25
-            elif metrics["harmonic_noise_ratio"] > 1.0:
-                quality_score += 20
-            else:
-                quality_score += 10
+            metrics["effective_duration"] = float(effective_duration)
+            metrics["silence_ratio"] = float(silence_ratio)
             
-            # Completeness score (0-25 points)
-            if metrics["silence_ratio"] < 0.1:
-                quality_score += 25
-            elif metrics["silence_ratio"] < 0.3:
-                quality_score += 20
-            elif metrics["silence_ratio"] < 0.5:
-                quality_score += 15
-            else:
-                quality_score += 5
-            
-            metrics["quality_score"] = float(quality_score)
+            # Quality Layer 6: the composite score is computed for all files
+            # at once in analyze_all_audio
             
-            logger.info(f"    ✅ Quality Score: {quality_score:.1f}/100")
-            logger.debug(f"      - Duration: {duration:.2f}s ({'✅' if duration >= 10 else '⚠️'})")
-            logger.debug(f"      - SNR Estimate: {metrics['snr_estimate']:.2f} ({'✅' if metrics['snr_estimate'] > 10 else '⚠️'})")
-            logger.debug(f"      - Harmonic/Noise: {metrics['harmonic_noise_ratio']:.2f} ({'✅' if metrics['harmonic_noise_ratio'] > 1.0 else '⚠️'})")
-            logger.debug(f"      - Silence Ratio: {metrics['silence_ratio']:.2f} ({'✅' if metrics['silence_ratio'] < 0.3 else '⚠️'})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("      - Duration: %.2fs (%s)", duration, '✅' if duration >= 10 else '⚠️')
+                logger.debug("      - SNR Estimate: %.2f (%s)", metrics['snr_estimate'], '✅' if metrics['snr_estimate'] > 10 else '⚠️')
+                logger.debug("      - Harmonic/Noise: %.2f (%s)", metrics['harmonic_noise_ratio'], '✅' if metrics['harmonic_noise_ratio'] > 3.0 else '⚠️')
+                logger.debug("      - Silence Ratio: %.2f (%s)", metrics['silence_ratio'], '✅' if metrics['silence_ratio'] < 0.3 else '⚠️')
             
             return metrics
             
         except Exception as e:
             logger.error(f"    ❌ Error analyzing {audio_path}: {e}")
-            import traceback
-            logger.debug(traceback.format_exc())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(traceback.format_exc())
             return None
     
     def analyze_all_audio(self):
@@ -210,25 +257,31 @@ class AudioQualityAnalyzer:
             return []
         
         # Find all audio files
-        audio_extensions = ['.wav', '.mp3', '.m4a', '.flac', '.ogg']
+        audio_extensions = ['.wav', '.mp3', '.m4a', '.flac', '.ogg', '.opus', '.webm']
         audio_files = []
         for ext in audio_extensions:
             audio_files.extend(list(self.audio_dir.glob(f"*{ext}")))
             audio_files.extend(list(self.audio_dir.glob(f"*{ext.upper()}")))
         
-        logger.info(f"Found {len(audio_files)} audio files to analyze")
+        logger.info(f"Found {len(audio_files)} audio files")
+        
+        # Drop files that can't score well before decoding any audio
+        audio_files = self._prefilter(audio_files)
+        logger.info(f"{len(audio_files)} audio files to analyze after header check")
         logger.info("")
         
-        # Analyze each file
-        for i, audio_file in enumerate(audio_files, 1):
-            logger.info(f"[{i}/{len(audio_files)}] Analyzing audio file...")
-            metrics = self.analyze_audio_file(audio_file)
-            if metrics:
-                self.results.append(metrics)
-            logger.info("")
+        # Analyze files in parallel; each one is independent and CPU-bound
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for i, metrics in enumerate(executor.map(self.analyze_audio_file, audio_files, chunksize=1), 1):
+                logger.info(f"[{i}/{len(audio_files)}] Analyzed audio file")
+                if metrics:
+                    self.results.append(metrics)
+        logger.info("")
         
-        # Sort by quality score
+        # Score every file in one vectorized pass, then sort by quality score
+        self._score_results()
         self.results.sort(key=lambda x: x['quality_score'], reverse=True)
+        self._build_results_array()
         
         logger.info("=" * 100)
         logger.info("QUALITY ANALYSIS SUMMARY")
@@ -255,12 +308,14 @@ class AudioQualityAnalyzer:
         logger.info(f"  - Maximum Silence Ratio: {max_silence}")
         logger.info("")
         
-        filtered = []
-        for result in self.results:
-            if (result['quality_score'] >= min_score and
-                result['duration'] >= min_duration and
-                result['silence_ratio'] <= max_silence):
-                filtered.append(result)
+        arr = self.results_arr
+        if arr is None or len(arr) != len(self.results):
+            arr = self._build_results_array()
+        
+        mask = ((arr.quality_score >= min_score) &
+                (arr.duration >= min_duration) &
+                (arr.silence_ratio <= max_silence))
+        filtered = [self.results[i] for i in np.nonzero(mask)[0]]
         
         logger.info(f"Files passing filter: {len(filtered)}/{len(self.results)}")
         logger.info("")
@@ -4,208 +4,216 @@ Audio Refinement Processor
 Multi-stage audio processing and refinement for optimal voice cloning quality.
 """
 
+import functools
 import logging
+import math
 import os
 import sys
 import time
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
-# Configure extensive logging
+import librosa
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+try:
+    import soxr
+except ImportError:
+    soxr = None
+
+from audio_io import cuda_available, iter_chunks, load_audio, stft_magnitude
+from audio_kernels import block_stats
+
+# Configure logging (set TTS_LOG_LEVEL=DEBUG for per-file detail)
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get("TTS_LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s | %(levelname)-8s | [%(filename)s:%(lineno)d] | %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=None)
+def _resample_ratio(orig_sr, target_sr):
+    """Reduced (up, down) polyphase factors for a sample-rate pair."""
+    g = math.gcd(int(orig_sr), int(target_sr))
+    return int(target_sr) // g, int(orig_sr) // g
+
+
 class AudioRefinementProcessor:
     """Multi-stage audio refinement for voice cloning."""
     
-    def __init__(self, input_dir="audio_samples", output_dir="refined_audio"):
+    def __init__(self, input_dir="audio_samples", output_dir="refined_audio", max_workers=None):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
+        self.max_workers = max_workers or os.cpu_count()
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-    def stage_1_normalize_audio(self, input_path, output_path):
-        """Stage 1: Normalize audio levels."""
+    def stage_1_normalize_audio(self, y, sr):
+        """Stage 1: Normalize audio levels.
+        
+        Also returns the stage 2 silence threshold (20dB below the new peak),
+        so the envelope peak is only scanned once.
+        """
         logger.info("  → Stage 1: Normalizing audio levels...")
         
         try:
-            import librosa
-            import soundfile as sf
-            import numpy as np
-            
-            # Load audio
-            y, sr = librosa.load(str(input_path), sr=None, mono=True)
-            
             # Normalize to -3dB peak (safe headroom)
             peak = np.max(np.abs(y))
             if peak > 0:
                 target_peak = 10 ** (-3 / 20)  # -3dB
                 y_normalized = y * (target_peak / peak)
             else:
+                target_peak = 0.0
                 y_normalized = y
             
-            # Save normalized audio
-            sf.write(str(output_path), y_normalized, sr)
+            silence_threshold = target_peak * 10 ** (-20 / 20)
             
             logger.info(f"    ✅ Normalized: peak {20*np.log10(peak+1e-10):.2f}dB -> -3dB")
-            return True
+            return y_normalized, sr, silence_threshold
             
         except Exception as e:
             logger.error(f"    ❌ Normalization failed: {e}")
-            return False
+            return None
     
-    def stage_2_remove_silence(self, input_path, output_path):
+    def stage_2_remove_silence(self, y, sr, silence_threshold=None):
         """Stage 2: Remove leading/trailing silence."""
         logger.info("  → Stage 2: Removing leading/trailing silence...")
         
         try:
-            import librosa
-            import soundfile as sf
-            
-            # Load audio
-            y, sr = librosa.load(str(input_path), sr=None, mono=True)
             original_duration = len(y) / sr
             
-            # Trim silence
-            y_trimmed, _ = librosa.effects.trim(
-                y,
-                top_db=20,  # Remove sounds quieter than 20dB below peak
-                frame_length=2048,
-                hop_length=512
-            )
+            # Remove sounds quieter than 20dB below peak
+            if silence_threshold is None:
+                silence_threshold = np.max(np.abs(y)) * 10 ** (-20 / 20)
+            
+            # Trim silence from both ends of the amplitude envelope
+            above = np.abs(y) > silence_threshold
+            start = int(np.argmax(above))
+            end = len(y) - int(np.argmax(above[::-1]))
+            y_trimmed = y[start:end]
             
             trimmed_duration = len(y_trimmed) / sr
             removed = original_duration - trimmed_duration
             
-            # Save trimmed audio
-            sf.write(str(output_path), y_trimmed, sr)
-            
             logger.info(f"    ✅ Trimmed: {original_duration:.2f}s -> {trimmed_duration:.2f}s (removed {removed:.2f}s)")
-            return True
+            return y_trimmed, sr
             
         except Exception as e:
             logger.error(f"    ❌ Silence removal failed: {e}")
-            return False
+            return None
     
-    def stage_3_noise_reduction(self, input_path, output_path):
+    def stage_3_noise_reduction(self, y, sr):
         """Stage 3: Reduce background noise."""
         logger.info("  → Stage 3: Reducing background noise...")
         
         try:
-            import librosa
-            import soundfile as sf
-            import numpy as np
-            from scipy import signal
-            
-            # Load audio
-            y, sr = librosa.load(str(input_path), sr=None, mono=True)
-            
             # Simple noise reduction using spectral gating
-            # Compute spectrogram
-            stft = librosa.stft(y, n_fft=2048, hop_length=512)
-            magnitude = np.abs(stft)
-            phase = np.angle(stft)
-            
-            # Estimate noise floor (using first 0.5 seconds)
+            # Estimate noise floor (using first 0.5 seconds); a prefix that
+            # covers those frames gives the same magnitudes as the full STFT
             noise_frames = int(0.5 * sr / 512)
-            if noise_frames > 0 and noise_frames < magnitude.shape[1]:
+            total_frames = 1 + len(y) // 512
+            if noise_frames > 0 and noise_frames < total_frames:
+                magnitude = stft_magnitude(y[:noise_frames * 512 + 2048], n_fft=2048, hop_length=512)
                 noise_floor = np.median(magnitude[:, :noise_frames], axis=1, keepdims=True)
             else:
+                magnitude = stft_magnitude(y, n_fft=2048, hop_length=512)
                 noise_floor = np.percentile(magnitude, 10, axis=1, keepdims=True)
             
-            # Apply spectral gating (attenuate below noise floor)
             threshold = noise_floor * 2.0  # 6dB above noise floor
-            mask = magnitude > threshold
-            magnitude_denoised = magnitude * mask + magnitude * 0.1 * (~mask)
             
-            # Reconstruct audio
-            stft_denoised = magnitude_denoised * np.exp(1j * phase)
-            y_denoised = librosa.istft(stft_denoised, hop_length=512)
+            # Gate hop-aligned chunks with enough context that every output
+            # sample is reconstructed from the same frames as a full-signal
+            # STFT, so only one chunk's spectrogram is alive at a time
+            gate = self._spectral_gate_cuda if cuda_available() else self._spectral_gate
+            y_denoised = np.empty(len(y), dtype=np.float32)
+            for start, stop, pad_start, pad_stop in iter_chunks(len(y), margin=2048):
+                segment = gate(y[pad_start:pad_stop], threshold)
+                y_denoised[start:stop] = segment[start - pad_start:stop - pad_start]
             
-            # Save denoised audio
-            sf.write(str(output_path), y_denoised, sr)
-            
-            logger.info(f"    ✅ Noise reduction applied")
-            return True
+            logger.info(f"    ✅ Noise reduction applied{' (CUDA)' if cuda_available() else ''}")
+            return y_denoised, sr
             
         except Exception as e:
             logger.error(f"    ❌ Noise reduction failed: {e}")
-            # If noise reduction fails, just copy the file
-            import shutil
-            shutil.copy(input_path, output_path)
-            return False
+            return None
+    
+    def _spectral_gate(self, y, threshold):
+        """Attenuate STFT bins below threshold by 20dB and resynthesize."""
+        stft = librosa.stft(y, n_fft=2048, hop_length=512)
+        
+        # Scaling the complex STFT by a real gain keeps the original phase
+        gain = np.where(np.abs(stft) > threshold, np.float32(1.0), np.float32(0.1))
+        return librosa.istft(stft * gain, hop_length=512, length=len(y))
+    
+    def _spectral_gate_cuda(self, y, threshold):
+        """_spectral_gate with torch.stft/istft on the GPU."""
+        import torch
+        
+        y_t = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32)).cuda()
+        threshold_t = torch.from_numpy(np.asarray(threshold, dtype=np.float32)).to(y_t.device)
+        window = torch.hann_window(2048, device=y_t.device)
+        stft = torch.stft(y_t, n_fft=2048, hop_length=512, window=window,
+                          center=True, pad_mode='constant', return_complex=True)
+        gain = torch.where(stft.abs() > threshold_t, 1.0, 0.1)
+        y_denoised = torch.istft(stft * gain, n_fft=2048, hop_length=512, window=window,
+                                 center=True, length=len(y))
+        return y_denoised.cpu().numpy()
     
-    def stage_4_resample_optimal(self, input_path, output_path, target_sr=22050):
+    def stage_4_resample_optimal(self, y, sr, target_sr=22050):
         """Stage 4: Resample to optimal sample rate for TTS."""
         logger.info(f"  → Stage 4: Resampling to {target_sr} Hz...")
         
         try:
-            import librosa
-            import soundfile as sf
-            
-            # Load audio
-            y, sr = librosa.load(str(input_path), sr=None, mono=True)
-            
             if sr != target_sr:
                 # Resample
-                y_resampled = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+                if soxr is not None:
+                    y_resampled = soxr.resample(y.astype(np.float32, copy=False), sr, target_sr, quality='HQ')
+                else:
+                    up, down = _resample_ratio(sr, target_sr)
+                    y_resampled = resample_poly(y, up, down).astype(np.float32, copy=False)
                 logger.info(f"    ✅ Resampled: {sr} Hz -> {target_sr} Hz")
             else:
                 y_resampled = y
                 logger.info(f"    ✅ Already at {target_sr} Hz")
             
-            # Save resampled audio
-            sf.write(str(output_path), y_resampled, target_sr)
-            
-            return True
+            return y_resampled, target_sr
             
         except Exception as e:
             logger.error(f"    ❌ Resampling failed: {e}")
-            return False
+            return None
     
-    def stage_5_extract_best_segment(self, input_path, output_path, target_duration=15.0):
+    def stage_5_extract_best_segment(self, y, sr, target_duration=15.0):
         """Stage 5: Extract best quality segment."""
         logger.info(f"  → Stage 5: Extracting best {target_duration}s segment...")
         
         try:
-            import librosa
-            import soundfile as sf
-            import numpy as np
-            
-            # Load audio
-            y, sr = librosa.load(str(input_path), sr=None, mono=True)
             duration = len(y) / sr
             
             if duration <= target_duration:
                 # Audio is already short enough
                 logger.info(f"    ✅ Audio duration ({duration:.2f}s) is already optimal")
-                import shutil
-                shutil.copy(input_path, output_path)
-                return True
+                return y, sr
             
             # Find best segment using energy analysis
             frame_length = 2048
             hop_length = 512
-            frames = librosa.util.frame(y, frame_length=frame_length, hop_length=hop_length)
-            frame_energy = np.sum(frames ** 2, axis=0)
+            # Each frame is four hop-sized blocks; sum block energies instead
+            # of squaring a materialized (frame_length, n_frames) copy
+            block_energy = block_stats(np.ascontiguousarray(y, dtype=np.float32), hop_length)[0]
+            frame_energy = np.convolve(block_energy, np.ones(frame_length // hop_length), mode='valid')
             
             # Find window with highest average energy
             target_frames = int(target_duration * sr / hop_length)
             if target_frames > len(frame_energy):
                 target_frames = len(frame_energy)
             
-            # Sliding window to find best segment
-            max_energy = 0
-            best_start = 0
-            
-            for i in range(len(frame_energy) - target_frames + 1):
-                window_energy = np.mean(frame_energy[i:i+target_frames])
-                if window_energy > max_energy:
-                    max_energy = window_energy
-                    best_start = i
+            # Sliding window to find best segment (box filter via prefix sums)
+            cumulative = np.concatenate(([0.0], np.cumsum(frame_energy, dtype=np.float64)))
+            window_sums = cumulative[target_frames:] - cumulative[:-target_frames]
+            best_start = int(np.argmax(window_sums))
             
             # Extract segment
             start_sample = best_start * hop_length
@@ -217,15 +225,12 @@ class AudioRefinementProcessor:
             
             y_segment = y[start_sample:end_sample]
             
-            # Save segment
-            sf.write(str(output_path), y_segment, sr)
-            
             logger.info(f"    ✅ Extracted: {start_sample/sr:.2f}s - {end_sample/sr:.2f}s (best quality segment)")
-            return True
+            return y_segment, sr
             
         except Exception as e:
             logger.error(f"    ❌ Segment extraction failed: {e}")
-            return False
+            return None
     
     def process_audio_file(self, input_path, output_name=None):
         """Process a single audio file through all refinement stages."""
@@ -239,35 +244,43 @@ class AudioRefinementProcessor:
         if output_name is None:
             output_name = f"refined_{input_path.stem}.wav"
         
-        # Stage outputs
-        stage1_path = self.output_dir / f"stage1_norm_{input_path.stem}.wav"
-        stage2_path = self.output_dir / f"stage2_trimmed_{input_path.stem}.wav"
-        stage3_path = self.output_dir / f"stage3_denoised_{input_path.stem}.wav"
-        stage4_path = self.output_dir / f"stage4_resampled_{input_path.stem}.wav"
         final_path = self.output_dir / output_name
         
         start_time = time.time()
         
-        # Run all stages
+        # Decode once, then run every stage in memory
         success = True
-        success &= self.stage_1_normalize_audio(input_path, stage1_path)
-        success &= self.stage_2_remove_silence(stage1_path, stage2_path)
-        success &= self.stage_3_noise_reduction(stage2_path, stage3_path)
-        success &= self.stage_4_resample_optimal(stage3_path, stage4_path)
-        success &= self.stage_5_extract_best_segment(stage4_path, final_path)
+        try:
+            y, sr = load_audio(input_path)
+            result = self.stage_1_normalize_audio(y, sr)
+            if result is None:
+                success = False
+            else:
+                y, sr, silence_threshold = result
+                for stage in (functools.partial(self.stage_2_remove_silence, silence_threshold=silence_threshold),
+                              self.stage_3_noise_reduction,
+                              self.stage_4_resample_optimal,
+                              self.stage_5_extract_best_segment):
+                    result = stage(y, sr)
+                    if result is None:
+                        success = False
+                        break
+                    y, sr = result
+            
+            if success:
+                # Clip in place so PCM_16 conversion can't wrap overshoots
+                np.clip(y, -1.0, 1.0, out=y)
+                sf.write(str(final_path), y, sr, subtype='PCM_16')
+        except Exception as e:
+            logger.error(f"    ❌ Could not load or write audio: {e}")
+            success = False
         
         processing_time = time.time() - start_time
         
-        # Cleanup intermediate files
-        for stage_file in [stage1_path, stage2_path, stage3_path, stage4_path]:
-            if stage_file.exists() and stage_file != final_path:
-                stage_file.unlink()
-        
         if success and final_path.exists():
             # Analyze final output
-            import librosa
-            y_final, sr_final = librosa.load(str(final_path), sr=None)
-            final_duration = len(y_final) / sr_final
+            final_duration = len(y) / sr
+            sr_final = int(sr)
             final_size = final_path.stat().st_size / (1024 * 1024)
             
             logger.info("")
@@ -298,13 +311,18 @@ class AudioRefinementProcessor:
         logger.info(f"Processing top {top_n} highest quality files...")
         logger.info("")
         
+        selected = quality_results[:top_n]
+        input_files = [result['file'] for result in selected]
+        output_names = [f"refined_top{i}_{Path(result['file']).stem}.wav" for i, result in enumerate(selected, 1)]
+        
+        # Refine files in parallel; map() keeps results in ranking order
         processed = []
-        for i, result in enumerate(quality_results[:top_n], 1):
-            logger.info(f"[{i}/{top_n}] Processing: {result['filename']}")
-            result_data = self.process_audio_file(result['file'], f"refined_top{i}_{Path(result['file']).stem}.wav")
-            if result_data.get('success'):
-                processed.append(result_data)
-            logger.info("")
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for i, (result, result_data) in enumerate(zip(selected, executor.map(self.process_audio_file, input_files, output_names)), 1):
+                logger.info(f"[{i}/{top_n}] Processed: {result['filename']}")
+                if result_data.get('success'):
+                    processed.append(result_data)
+        logger.info("")
         
         logger.info("=" * 100)
         logger.info("REFINEMENT SUMMARY")
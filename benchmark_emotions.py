@@ -5,107 +5,468 @@ Comprehensive benchmarking of emotional expressions using IndexTTS2 API.
 Analyzes pitch, energy, tempo, spectral features, and emotional expressiveness.
 """
 
+import functools
 import logging
+import math
+import multiprocessing
 import os
 import sys
 import time
 import json
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from collections import Counter, defaultdict
 
-# Configure logging
+import librosa
+import numpy as np
+import scipy.fft
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import resample_poly
+
+# Configure logging (set TTS_LOG_LEVEL=DEBUG for per-file detail)
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.environ.get("TTS_LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s | %(levelname)-8s | [%(filename)s:%(lineno)d] | %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 logger = logging.getLogger(__name__)
 
+from audio_io import cuda_available, load_audio, stft_magnitude
 from call_indextts2_api import call_indextts2_api
 
+# Sample rate every file is analyzed at
+ANALYSIS_SR = 16000
+
+# Clips shorter than this (seconds) skip beat tracking
+MIN_TEMPO_DURATION = 10.0
+
+# Per-file feature cache written next to each analyzed wav; bump the version
+# whenever extract_emotion_features changes what it computes
+FEATURES_SUFFIX = ".features.json"
+FEATURES_VERSION = 1
+
+# Pitch search range (C2-C7)
+PITCH_FMIN = librosa.note_to_hz('C2')
+PITCH_FMAX = librosa.note_to_hz('C7')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import sonara
+except ImportError:
+    sonara = None
+
+try:
+    from audio_kernels import yin_pitch
+except ImportError:
+    yin_pitch = None
+
+
+# (label, emotion vector intensity, emotion weight) for single-emotion configs
+INTENSITY_TABLE = (
+    ("low", 0.3, 0.5),
+    ("medium", 0.6, 0.7),
+    ("high", 0.9, 0.9),
+)
+
+EMOTIONS = ("happy", "sad", "angry", "surprised", "calm", "afraid", "disgusted", "melancholic")
+
+MIXED_EMOTIONS = (
+    ("happy_calm", {"happy": 0.6, "calm": 0.4}),
+    ("sad_melancholic", {"sad": 0.7, "melancholic": 0.3}),
+    ("surprised_happy", {"surprised": 0.5, "happy": 0.5}),
+    ("angry_afraid", {"angry": 0.6, "afraid": 0.4}),
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _build_emotion_configs():
+    """Emotion test configurations; built once per process."""
+    # Baseline: Natural
+    configs = [{
+        "name": "natural",
+        "description": "Natural emotion (baseline)",
+        "emo_control_method": "Same as the voice reference",
+        "emotion_vectors": None,
+        "emotion_weight": 1.0,
+        "is_baseline": True
+    }]
+    
+    # Single emotions with varying intensities
+    for emotion in EMOTIONS:
+        for label, intensity, weight in INTENSITY_TABLE:
+            configs.append({
+                "name": f"{emotion}_{label}",
+                "description": f"{emotion.capitalize()} ({label} intensity: {intensity})",
+                "emo_control_method": "Use emotion vectors",
+                "emotion_vectors": {emotion: intensity},
+                "emotion_weight": weight,
+                "is_baseline": False
+            })
+    
+    # Mixed emotions
+    for name, vectors in MIXED_EMOTIONS:
+        configs.append({
+            "name": name,
+            "description": f"Mixed: {name.replace('_', ' + ')}",
+            "emo_control_method": "Use emotion vectors",
+            "emotion_vectors": vectors,
+            "emotion_weight": 0.8,
+            "is_baseline": False
+        })
+    
+    return tuple(configs)
+
+
+# (group, comparison key, feature key) for each baseline comparison
+COMPARISON_FEATURES = (
+    ("pitch", "mean_diff", "pitch_mean"),
+    ("pitch", "std_diff", "pitch_std"),
+    ("pitch", "range_diff", "pitch_range"),
+    ("pitch", "variation_diff", "pitch_variation"),
+    ("energy", "mean_diff", "energy_mean"),
+    ("energy", "std_diff", "energy_std"),
+    ("energy", "dynamics_diff", "energy_dynamics"),
+)
+
+
+def _comparison_vector(features):
+    """Compared features as one array, expressiveness score last."""
+    values = [features[group][key] for group, _, key in COMPARISON_FEATURES]
+    values.append(features["expressiveness_score"])
+    return np.array(values, dtype=np.float64)
+
+
+def _write_json(path, data):
+    """Write data as indented JSON, via orjson when it is installed."""
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+
+def _generate_one(job):
+    """Generate one (text, config) sample; runs in a generation worker."""
+    i, text, config, output_file, voice_reference = job
+    
+    gen_start = time.time()
+    
+    try:
+        success = call_indextts2_api(
+            voice_reference=voice_reference,
+            text=text,
+            output_file=str(output_file),
+            emo_control_method=config["emo_control_method"],
+            emotion_vectors=config.get("emotion_vectors"),
+            emotion_weight=config.get("emotion_weight", 0.8)
+        )
+        
+        gen_time = time.time() - gen_start
+        
+        if success and output_file.exists():
+            logger.info("  ✅ Generated %s (%s) in %.2fs", output_file.name, config['description'], gen_time)
+            return {
+                "text_number": i,
+                "text": text,
+                "config": config,
+                "output_file": str(output_file),
+                "generation_time": gen_time,
+                "success": True
+            }
+        
+        logger.warning("  ⚠️  Generation failed: %s", output_file.name)
+        return {
+            "text_number": i,
+            "text": text,
+            "config": config,
+            "success": False
+        }
+    except Exception as e:
+        logger.error("  ❌ Error generating %s: %s", output_file.name, e)
+        return {
+            "text_number": i,
+            "text": text,
+            "config": config,
+            "success": False,
+            "error": str(e)
+        }
+
+
+def _analyze_batch(audio_paths):
+    """Extract features for a batch of files; runs in an analysis worker process."""
+    return EmotionBenchmarker.extract_emotion_features_batch(audio_paths)
+
+
 class EmotionBenchmarker:
     """Comprehensive emotion expression benchmarking system."""
     
-    def __init__(self):
+    def __init__(self, max_workers=None, generation_workers=4):
         self.results = []
         self.analysis_cache = {}
-        
-    def extract_emotion_features(self, audio_path):
+        # Analysis is CPU-bound (one process per core); generation is API-bound
+        # and limited by the Space's quota, so it gets a small thread pool
+        self.max_workers = max_workers or os.cpu_count()
+        self.generation_workers = generation_workers
+        
+    @staticmethod
+    def _cache_key(audio_path):
+        """Key for analysis_cache: absolute path plus modification time."""
+        path = Path(audio_path).resolve()
+        return str(path), path.stat().st_mtime_ns
+    
+    @staticmethod
+    def extract_emotion_features(audio_path):
         """Extract emotion-related audio features."""
+        return EmotionBenchmarker.extract_emotion_features_batch([audio_path])[0]
+    
+    @staticmethod
+    def extract_emotion_features_batch(audio_paths):
+        """Extract features for several files, sharing one batched STFT pass.
+        
+        Returns one features dict per path (None where extraction failed).
+        Works best on clips of similar length, e.g. one text's emotions.
+        """
+        features = [None] * len(audio_paths)
+        
+        signals = {}
+        for index, audio_path in enumerate(audio_paths):
+            features[index] = EmotionBenchmarker._load_features_sidecar(audio_path)
+            if features[index] is not None:
+                logger.debug("Using cached features for: %s", audio_path)
+                continue
+            try:
+                logger.debug("Extracting features from: %s", audio_path)
+                
+                # Load audio at a fixed analysis rate: prosody features live well
+                # below 8 kHz, and baseline and emotion samples are compared at
+                # the same rate whatever the TTS output rate was
+                y, sr = load_audio(audio_path)
+                if sr != ANALYSIS_SR:
+                    g = math.gcd(sr, ANALYSIS_SR)
+                    y = resample_poly(y, ANALYSIS_SR // g, sr // g).astype(np.float32, copy=False)
+                if len(y) == 0:
+                    raise ValueError("empty audio")
+                signals[index] = y
+            except Exception as e:
+                logger.error(f"Error extracting features from {audio_path}: {e}")
+        
+        if not signals:
+            return features
+        
+        try:
+            frame_features = EmotionBenchmarker._batch_frame_features(list(signals.values()), ANALYSIS_SR)
+        except Exception as e:
+            logger.error(f"Error extracting features from {len(signals)} files: {e}")
+            logger.error(traceback.format_exc())
+            return features
+        
+        for (index, y), frames in zip(signals.items(), frame_features):
+            features[index] = EmotionBenchmarker._summarize_features(audio_paths[index], y, ANALYSIS_SR, *frames)
+            if features[index] is not None:
+                EmotionBenchmarker._save_features_sidecar(audio_paths[index], features[index])
+        return features
+    
+    @staticmethod
+    def _load_features_sidecar(audio_path):
+        """Features saved next to audio_path, if still valid for that file."""
+        audio_path = Path(audio_path)
+        sidecar = audio_path.with_suffix(FEATURES_SUFFIX)
+        try:
+            if sidecar.stat().st_mtime_ns < audio_path.stat().st_mtime_ns:
+                return None
+            cached = json.loads(sidecar.read_bytes())
+        except (OSError, ValueError):
+            return None
+        if cached.get("version") != FEATURES_VERSION:
+            return None
+        return cached.get("features")
+    
+    @staticmethod
+    def _save_features_sidecar(audio_path, features):
+        """Save features next to audio_path so later runs can skip extraction."""
+        sidecar = Path(audio_path).with_suffix(FEATURES_SUFFIX)
+        try:
+            _write_json(sidecar, {"version": FEATURES_VERSION, "features": features})
+        except OSError as e:
+            logger.debug("Could not write %s: %s", sidecar.name, e)
+    
+    @staticmethod
+    def _batch_frame_features(signals, sr, n_fft=2048, hop_length=512):
+        """Frame-level spectral/energy features for a batch of signals.
+        
+        Signals are zero-padded into one (B, T) array so the STFT, mel and
+        MFCC run once for the batch. Centered framing pads with zeros too,
+        so each row's own frames are identical to analyzing it alone; the
+        frames past its end are dropped. Returns, per signal,
+        (mel_db, rms, spectral_centroids, spectral_rolloff, mfccs).
+        """
+        lengths = [len(y) for y in signals]
+        batch = np.zeros((len(signals), max(lengths)), dtype=np.float32)
+        for row, y in enumerate(signals):
+            batch[row, :len(y)] = y
+        
+        # One STFT feeds every spectral feature below (including the
+        # onset envelope for beat tracking) instead of one per feature.
+        # RMS stays time-domain: rms(S=...) is Hann-windowed and would
+        # shift the energy scale the expressiveness score is tuned to.
+        if cuda_available():
+            mel_db, spectral_centroids, spectral_rolloff, mfccs = \
+                EmotionBenchmarker._spectral_features_torch(batch, sr, n_fft, hop_length, device="cuda")
+        else:
+            S = stft_magnitude(batch, n_fft=n_fft, hop_length=hop_length)
+            mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=S ** 2, sr=sr), top_db=None)
+            # Apply the 80 dB floor per clip, as power_to_db would on each alone
+            mel_db = np.maximum(mel_db, mel_db.max(axis=(-2, -1), keepdims=True) - 80.0)
+            spectral_centroids = librosa.feature.spectral_centroid(S=S, sr=sr)[:, 0]
+            spectral_rolloff = librosa.feature.spectral_rolloff(S=S, sr=sr)[:, 0]
+            mfccs = librosa.feature.mfcc(S=mel_db, sr=sr, n_mfcc=13)
+        
+        rms = librosa.feature.rms(y=batch, frame_length=n_fft, hop_length=hop_length)[:, 0]
+        
+        frame_features = []
+        for row, length in enumerate(lengths):
+            n_frames = 1 + length // hop_length
+            frame_features.append((
+                mel_db[row, :, :n_frames],
+                rms[row, :n_frames],
+                spectral_centroids[row, :n_frames],
+                spectral_rolloff[row, :n_frames],
+                mfccs[row, :, :n_frames],
+            ))
+        return frame_features
+    
+    @staticmethod
+    def _spectral_features_torch(batch, sr, n_fft=2048, hop_length=512, n_mfcc=13, device="cuda"):
+        """Torch version of the librosa spectral stack for a (B, T) batch.
+        
+        Uses librosa's own mel filterbank and an orthonormal DCT-II so the
+        results match the CPU path; only the small per-frame feature arrays
+        are copied back. Returns (mel_db, spectral_centroids,
+        spectral_rolloff, mfccs) as numpy arrays.
+        """
+        import torch
+        
+        y = torch.from_numpy(np.ascontiguousarray(batch, dtype=np.float32)).to(device)
+        window = torch.hann_window(n_fft, device=device)
+        S = torch.stft(y, n_fft=n_fft, hop_length=hop_length, window=window,
+                       center=True, pad_mode='constant', return_complex=True).abs()
+        
+        mel_basis = torch.from_numpy(librosa.filters.mel(sr=sr, n_fft=n_fft)).to(device)
+        mel_db = 10.0 * torch.log10(torch.clamp(mel_basis @ S ** 2, min=1e-10))
+        # Apply the 80 dB floor per clip, as power_to_db would on each alone
+        mel_db = torch.maximum(mel_db, mel_db.amax(dim=(-2, -1), keepdim=True) - 80.0)
+        dct = torch.from_numpy(
+            scipy.fft.dct(np.eye(mel_db.shape[-2], dtype=np.float32), type=2, norm='ortho', axis=0)[:n_mfcc]
+        ).to(device)
+        mfccs = dct @ mel_db
+        
+        freqs = torch.from_numpy(librosa.fft_frequencies(sr=sr, n_fft=n_fft).astype(np.float32)).to(device)
+        magnitude = S.sum(dim=-2)
+        centroids = (freqs[:, None] * S).sum(dim=-2) / torch.clamp(magnitude, min=np.finfo(np.float32).tiny)
+        # Rolloff: lowest bin whose cumulative energy reaches 85% of the frame total
+        cumulative = S.cumsum(dim=-2)
+        rolloff_bin = (cumulative >= 0.85 * cumulative[..., -1:, :]).int().argmax(dim=-2)
+        rolloff = freqs[rolloff_bin]
+        
+        return (mel_db.cpu().numpy(), centroids.cpu().numpy(),
+                rolloff.cpu().numpy(), mfccs.cpu().numpy())
+    
+    @staticmethod
+    def _summarize_features(audio_path, y, sr, mel_db, rms, spectral_centroids, spectral_rolloff, mfccs):
+        """Reduce one clip's frame features to the emotion feature dict."""
         try:
-            import librosa
-            import numpy as np
-            
-            logger.debug(f"Extracting features from: {Path(audio_path).name}")
-            
-            # Load audio
-            y, sr = librosa.load(str(audio_path), sr=None, mono=True)
             duration = len(y) / sr
             
             # 1. Pitch Features (F0 - fundamental frequency)
             try:
+                if yin_pitch is not None:
+                    # Compiled YIN on pyin's frame grid; skips pyin's Viterbi decoding
+                    f0, voiced_flag = yin_pitch(
+                        y.astype(np.float64),
+                        sr,
+                        PITCH_FMIN,
+                        PITCH_FMAX
+                    )
+                    f0_clean = f0[voiced_flag]
+                    voiced_ratio = float(np.mean(voiced_flag)) if len(voiced_flag) > 0 else 0.0
                 # Try librosa.pyin (requires librosa >= 0.9.0)
-                if hasattr(librosa, 'pyin'):
+                elif hasattr(librosa, 'pyin'):
                     f0, voiced_flag, voiced_probs = librosa.pyin(
                         y, 
-                        fmin=librosa.note_to_hz('C2'), 
-                        fmax=librosa.note_to_hz('C7')
+                        fmin=PITCH_FMIN,
+                        fmax=PITCH_FMAX
                     )
                     f0_clean = f0[~np.isnan(f0)]
                     voiced_ratio = float(np.sum(voiced_flag) / len(voiced_flag)) if len(voiced_flag) > 0 else 0.0
                 else:
                     # Fallback: use autocorrelation-based pitch estimation
-                    try:
-                        import scipy.signal
-                    except ImportError:
-                        scipy = None
-                    # Simple autocorrelation pitch estimation
                     frame_length = 2048
                     hop_length = 512
-                    frames = librosa.util.frame(y, frame_length=frame_length, hop_length=hop_length)
-                    f0_clean = []
-                    for frame in frames.T:
-                        # Autocorrelation
-                        autocorr = np.correlate(frame, frame, mode='full')
-                        autocorr = autocorr[len(autocorr)//2:]
-                        # Find peak (excluding DC)
-                        if len(autocorr) > 100:
-                            peak_idx = np.argmax(autocorr[20:]) + 20
-                            if peak_idx > 0:
-                                f0_est = sr / peak_idx
-                                if 80 <= f0_est <= 400:  # Human voice range
-                                    f0_clean.append(f0_est)
-                    f0_clean = np.array(f0_clean)
-                    voiced_ratio = len(f0_clean) / (len(frames[0]) if len(frames) > 0 else 1)
+                    # Zero-copy (n_frames, frame_length) view of the signal
+                    frames = sliding_window_view(y, frame_length)[::hop_length]
+                    # Autocorrelation of every frame at once (zero-padded FFT
+                    # is the linear autocorrelation), non-negative lags only
+                    spectrum = np.fft.rfft(frames, n=2 * frame_length, axis=1)
+                    autocorr = np.fft.irfft(np.abs(spectrum) ** 2, n=2 * frame_length, axis=1)[:, :frame_length]
+                    # Find peak (excluding DC), keep the human voice range
+                    peak_idx = np.argmax(autocorr[:, 20:], axis=1) + 20
+                    f0_est = sr / peak_idx
+                    f0_clean = f0_est[(f0_est >= 80) & (f0_est <= 400)]
+                    voiced_ratio = len(f0_clean) / (frames.shape[0] if frames.shape[0] > 0 else 1)
             except Exception as e:
                 logger.warning(f"Pitch extraction failed, using fallback: {e}")
                 # Fallback: estimate from spectral centroid
-                spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
                 f0_clean = spectral_centroids / 4  # Rough approximation
                 voiced_ratio = 0.5
             
+            # Reduce each array once and reuse the scalars below
+            if len(f0_clean) > 0:
+                f0_mean = float(np.mean(f0_clean))
+                f0_std = float(np.std(f0_clean))
+                f0_range = float(np.max(f0_clean) - np.min(f0_clean))
+            else:
+                f0_mean = f0_std = f0_range = 0.0
+            
             pitch_features = {
-                "pitch_mean": float(np.mean(f0_clean)) if len(f0_clean) > 0 else 0.0,
-                "pitch_std": float(np.std(f0_clean)) if len(f0_clean) > 0 else 0.0,
-                "pitch_range": float(np.max(f0_clean) - np.min(f0_clean)) if len(f0_clean) > 0 else 0.0,
-                "pitch_variation": float(np.std(f0_clean) / np.mean(f0_clean)) if len(f0_clean) > 0 and np.mean(f0_clean) > 0 else 0.0,
+                "pitch_mean": f0_mean,
+                "pitch_std": f0_std,
+                "pitch_range": f0_range,
+                "pitch_variation": f0_std / f0_mean if f0_mean > 0 else 0.0,
                 "voiced_ratio": float(voiced_ratio),
             }
             
             # 2. Energy Features (intensity, dynamics)
-            rms = librosa.feature.rms(y=y)[0]
+            rms_mean = np.mean(rms)
+            rms_std = np.std(rms)
+            rms_max = rms.max()
+            rms_min = rms.min()
             energy_features = {
-                "energy_mean": float(np.mean(rms)),
-                "energy_std": float(np.std(rms)),
-                "energy_max": float(np.max(rms)),
-                "energy_min": float(np.min(rms)),
-                "energy_range": float(np.max(rms) - np.min(rms)),
-                "energy_dynamics": float(np.std(rms) / np.mean(rms)) if np.mean(rms) > 0 else 0.0,
+                "energy_mean": float(rms_mean),
+                "energy_std": float(rms_std),
+                "energy_max": float(rms_max),
+                "energy_min": float(rms_min),
+                "energy_range": float(rms_max - rms_min),
+                "energy_dynamics": float(rms_std / rms_mean) if rms_mean > 0 else 0.0,
             }
             
             # 3. Tempo/Rhythm Features
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
+            # Beat tracking needs several bars to lock on; on short TTS
+            # utterances it is expensive noise, so report no beats instead
+            if duration < MIN_TEMPO_DURATION:
+                tempo, beats = 0.0, np.empty(0, dtype=int)
+            else:
+                onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr)
+                if sonara is not None:
+                    # sonara's Rust beat tracker, fed the same onset envelope
+                    tempo, beats = sonara.beat_track(onset_envelope=onset_env.astype(np.float32), sr=sr)
+                else:
+                    tempo, beats = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
             tempo_features = {
                 "tempo_bpm": float(tempo),
                 "beat_count": int(len(beats)),
@@ -113,26 +474,24 @@ class EmotionBenchmarker:
             }
             
             # 4. Spectral Features (timbre, brightness)
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-            
+            centroid_mean = float(np.mean(spectral_centroids))
             spectral_features = {
-                "spectral_centroid_mean": float(np.mean(spectral_centroids)),
+                "spectral_centroid_mean": centroid_mean,
                 "spectral_centroid_std": float(np.std(spectral_centroids)),
                 "spectral_rolloff_mean": float(np.mean(spectral_rolloff)),
                 "spectral_rolloff_std": float(np.std(spectral_rolloff)),
-                "brightness": float(np.mean(spectral_centroids)),  # Higher = brighter
-                "mfcc_mean": [float(np.mean(mfcc)) for mfcc in mfccs],
+                "brightness": centroid_mean,  # Higher = brighter
+                "mfcc_mean": mfccs.mean(axis=1).tolist(),
             }
             
             # 5. Prosody Features (speech rhythm, stress patterns)
             # Zero crossing rate variation (speech vs silence patterns)
             zcr = librosa.feature.zero_crossing_rate(y)[0]
+            zcr_mean = np.mean(zcr)
             prosody_features = {
-                "zcr_mean": float(np.mean(zcr)),
+                "zcr_mean": float(zcr_mean),
                 "zcr_std": float(np.std(zcr)),
-                "speech_rate": float(np.mean(zcr) * sr / 2),  # Approximate speech rate
+                "speech_rate": float(zcr_mean * sr / 2),  # Approximate speech rate
             }
             
             # 6. Emotional Expressiveness Score
@@ -159,7 +518,6 @@ class EmotionBenchmarker:
             
         except Exception as e:
             logger.error(f"Error extracting features from {audio_path}: {e}")
-            import traceback
             logger.error(traceback.format_exc())
             return None
     
@@ -168,102 +526,23 @@ class EmotionBenchmarker:
         if not baseline_features or not emotion_features:
             return None
         
-        comparisons = {}
-        
-        # Pitch comparison
-        pitch_diff = {
-            "mean_diff": emotion_features["pitch"]["pitch_mean"] - baseline_features["pitch"]["pitch_mean"],
-            "std_diff": emotion_features["pitch"]["pitch_std"] - baseline_features["pitch"]["pitch_std"],
-            "range_diff": emotion_features["pitch"]["pitch_range"] - baseline_features["pitch"]["pitch_range"],
-            "variation_diff": emotion_features["pitch"]["pitch_variation"] - baseline_features["pitch"]["pitch_variation"],
-        }
+        # One subtraction over every compared feature, then unpack by name
+        diff = (_comparison_vector(emotion_features) - _comparison_vector(baseline_features)).tolist()
         
-        # Energy comparison
-        energy_diff = {
-            "mean_diff": emotion_features["energy"]["energy_mean"] - baseline_features["energy"]["energy_mean"],
-            "std_diff": emotion_features["energy"]["energy_std"] - baseline_features["energy"]["energy_std"],
-            "dynamics_diff": emotion_features["energy"]["energy_dynamics"] - baseline_features["energy"]["energy_dynamics"],
-        }
+        comparisons = {"pitch": {}, "energy": {}}
+        for (group, name, _), value in zip(COMPARISON_FEATURES, diff):
+            comparisons[group][name] = value
         
         # Expressiveness comparison
-        expressiveness_diff = emotion_features["expressiveness_score"] - baseline_features["expressiveness_score"]
-        
-        comparisons = {
-            "pitch": pitch_diff,
-            "energy": energy_diff,
-            "expressiveness_diff": float(expressiveness_diff),
-            "more_expressive": expressiveness_diff > 0,
-        }
+        expressiveness_diff = diff[-1]
+        comparisons["expressiveness_diff"] = expressiveness_diff
+        comparisons["more_expressive"] = expressiveness_diff > 0
         
         return comparisons
     
     def generate_emotion_configs(self):
         """Generate comprehensive emotion test configurations."""
-        configs = []
-        
-        # Baseline: Natural
-        configs.append({
-            "name": "natural",
-            "description": "Natural emotion (baseline)",
-            "emo_control_method": "Same as the voice reference",
-            "emotion_vectors": None,
-            "emotion_weight": 1.0,
-            "is_baseline": True
-        })
-        
-        # Single emotions with varying intensities
-        emotions = ["happy", "sad", "angry", "surprised", "calm", "afraid", "disgusted", "melancholic"]
-        
-        for emotion in emotions:
-            # Low intensity (0.3)
-            configs.append({
-                "name": f"{emotion}_low",
-                "description": f"{emotion.capitalize()} (low intensity: 0.3)",
-                "emo_control_method": "Use emotion vectors",
-                "emotion_vectors": {emotion: 0.3},
-                "emotion_weight": 0.5,
-                "is_baseline": False
-            })
-            
-            # Medium intensity (0.6)
-            configs.append({
-                "name": f"{emotion}_medium",
-                "description": f"{emotion.capitalize()} (medium intensity: 0.6)",
-                "emo_control_method": "Use emotion vectors",
-                "emotion_vectors": {emotion: 0.6},
-                "emotion_weight": 0.7,
-                "is_baseline": False
-            })
-            
-            # High intensity (0.9)
-            configs.append({
-                "name": f"{emotion}_high",
-                "description": f"{emotion.capitalize()} (high intensity: 0.9)",
-                "emo_control_method": "Use emotion vectors",
-                "emotion_vectors": {emotion: 0.9},
-                "emotion_weight": 0.9,
-                "is_baseline": False
-            })
-        
-        # Mixed emotions
-        mixed_configs = [
-            {"name": "happy_calm", "vectors": {"happy": 0.6, "calm": 0.4}},
-            {"name": "sad_melancholic", "vectors": {"sad": 0.7, "melancholic": 0.3}},
-            {"name": "surprised_happy", "vectors": {"surprised": 0.5, "happy": 0.5}},
-            {"name": "angry_afraid", "vectors": {"angry": 0.6, "afraid": 0.4}},
-        ]
-        
-        for mixed in mixed_configs:
-            configs.append({
-                "name": mixed["name"],
-                "description": f"Mixed: {mixed['name'].replace('_', ' + ')}",
-                "emo_control_method": "Use emotion vectors",
-                "emotion_vectors": mixed["vectors"],
-                "emotion_weight": 0.8,
-                "is_baseline": False
-            })
-        
-        return configs
+        return list(_build_emotion_configs())
     
     def run_benchmark(self, voice_reference, texts, output_dir="test_outputs/emotion_benchmark"):
         """Run comprehensive emotion benchmarking."""
@@ -273,19 +552,13 @@ class EmotionBenchmarker:
         logger.info("=" * 100)
         logger.info("EMOTION EXPRESSION BENCHMARKING")
         logger.info("=" * 100)
-        logger.info("")
         logger.info(f"Voice reference: {Path(voice_reference).name}")
         logger.info(f"Number of texts: {len(texts)}")
         logger.info(f"Output directory: {output_path}")
-        logger.info("")
         
         # Generate emotion configurations
         configs = self.generate_emotion_configs()
         logger.info(f"Total emotion configurations: {len(configs)}")
-        logger.info("")
-        
-        all_results = []
-        baseline_results = {}
         
         total_start = time.time()
         
@@ -293,118 +566,99 @@ class EmotionBenchmarker:
         logger.info("-" * 100)
         logger.info("PHASE 1: GENERATING SAMPLES")
         logger.info("-" * 100)
-        logger.info("")
         
+        jobs = []
         for i, text in enumerate(texts, 1):
             logger.info(f"Text {i}/{len(texts)}: '{text[:60]}...'")
-            logger.info("")
-            
             for config in configs:
                 output_file = output_path / f"text_{i:02d}_{config['name']}.wav"
-                
-                logger.info(f"  Generating: {config['name']} ({config['description']})")
-                
-                gen_start = time.time()
-                
-                try:
-                    success = call_indextts2_api(
-                        voice_reference=voice_reference,
-                        text=text,
-                        output_file=str(output_file),
-                        emo_control_method=config["emo_control_method"],
-                        emotion_vectors=config.get("emotion_vectors"),
-                        emotion_weight=config.get("emotion_weight", 0.8)
-                    )
-                    
-                    gen_time = time.time() - gen_start
-                    
-                    if success and output_file.exists():
-                        all_results.append({
-                            "text_number": i,
-                            "text": text,
-                            "config": config,
-                            "output_file": str(output_file),
-                            "generation_time": gen_time,
-                            "success": True
-                        })
-                        
-                        # Store baseline for comparison
-                        if config.get("is_baseline"):
-                            baseline_key = f"text_{i}"
-                            if baseline_key not in baseline_results:
-                                baseline_results[baseline_key] = str(output_file)
-                        
-                        logger.info(f"    ✅ Generated in {gen_time:.2f}s")
-                    else:
-                        logger.warning(f"    ⚠️  Generation failed")
-                        all_results.append({
-                            "text_number": i,
-                            "text": text,
-                            "config": config,
-                            "success": False
-                        })
-                except Exception as e:
-                    logger.error(f"    ❌ Error: {e}")
-                    all_results.append({
-                        "text_number": i,
-                        "text": text,
-                        "config": config,
-                        "success": False,
-                        "error": str(e)
-                    })
-                
-                logger.info("")
+                jobs.append((i, text, config, output_file, voice_reference))
+        
+        # Generations overlap on the API side, and as soon as every sample
+        # for a text is done that text's files go to the analysis pool as one
+        # batch, so feature extraction runs under the remaining generation
+        # latency and similar-length clips share a batched STFT. Features are
+        # memoized by absolute path (and mtime, so regenerated files aren't
+        # served stale), so each file is analyzed once and reruns on this
+        # instance are free.
+        all_results = [None] * len(jobs)
+        remaining = Counter(job[0] for job in jobs)
+        ready = defaultdict(list)
+        submitted = set()
+        analysis_futures = {}
+        # Analysis workers are spawned, not forked: forking while generation
+        # threads hold locks (logging, HTTP) can deadlock the child
+        with ThreadPoolExecutor(max_workers=self.generation_workers) as generation_executor, \
+                ProcessPoolExecutor(max_workers=self.max_workers,
+                                    mp_context=multiprocessing.get_context("spawn")) as analysis_executor:
+            generation_futures = {
+                generation_executor.submit(_generate_one, job): index
+                for index, job in enumerate(jobs)
+            }
+            for future in as_completed(generation_futures):
+                result = future.result()
+                all_results[generation_futures[future]] = result
+                text_number = result["text_number"]
+                if result.get("success"):
+                    key = self._cache_key(result["output_file"])
+                    if key not in self.analysis_cache and key not in submitted:
+                        submitted.add(key)
+                        ready[text_number].append(key)
+                remaining[text_number] -= 1
+                if remaining[text_number] == 0 and ready[text_number]:
+                    batch = ready.pop(text_number)
+                    paths = [path for path, _ in batch]
+                    analysis_futures[analysis_executor.submit(_analyze_batch, paths)] = batch
+            
+            # Phase 2: Collect the analyses started during generation
+            logger.info("-" * 100)
+            logger.info("PHASE 2: ANALYZING EMOTION FEATURES")
+            logger.info("-" * 100)
             
-            logger.info("")
+            for future in as_completed(analysis_futures):
+                for key, features in zip(analysis_futures[future], future.result()):
+                    if features:
+                        self.analysis_cache[key] = features
         
-        # Phase 2: Analyze all generated samples
-        logger.info("-" * 100)
-        logger.info("PHASE 2: ANALYZING EMOTION FEATURES")
-        logger.info("-" * 100)
-        logger.info("")
+        generated = [r for r in all_results if r.get("success")]
         
         analysis_results = []
+        baseline_files = {}
         
-        for result in all_results:
-            if not result.get("success"):
-                continue
-            
-            output_file = result["output_file"]
-            logger.info(f"Analyzing: {Path(output_file).name}")
-            
-            features = self.extract_emotion_features(output_file)
-            
+        log_samples = logger.isEnabledFor(logging.INFO)
+        for result in generated:
+            key = self._cache_key(result["output_file"])
+            features = self.analysis_cache.get(key)
             if features:
                 result["features"] = features
                 analysis_results.append(result)
-                
-                # Compare with baseline if not baseline
-                if not result["config"].get("is_baseline"):
-                    baseline_key = f"text_{result['text_number']}"
-                    if baseline_key in baseline_results:
-                        baseline_file = baseline_results[baseline_key]
-                        baseline_features = self.extract_emotion_features(baseline_file)
-                        if baseline_features:
-                            comparison = self.compare_emotions(baseline_features, features)
-                            result["comparison"] = comparison
-                
-                logger.info(f"  ✅ Expressiveness score: {features['expressiveness_score']:.2f}")
+                if result["config"].get("is_baseline"):
+                    baseline_files.setdefault(result["text_number"], key)
+                if log_samples:
+                    logger.info("  ✅ %s: expressiveness score %.2f",
+                                Path(result['output_file']).name, features['expressiveness_score'])
             else:
-                logger.warning(f"  ⚠️  Feature extraction failed")
-            
-            logger.info("")
+                logger.warning("  ⚠️  Feature extraction failed: %s", Path(result['output_file']).name)
+        
+        # Compare each emotion against its text's baseline
+        for result in analysis_results:
+            if not result["config"].get("is_baseline"):
+                baseline_file = baseline_files.get(result["text_number"])
+                if baseline_file:
+                    result["comparison"] = self.compare_emotions(
+                        self.analysis_cache[baseline_file], result["features"]
+                    )
+        
         
         # Phase 3: Generate report
         logger.info("-" * 100)
         logger.info("PHASE 3: GENERATING BENCHMARK REPORT")
         logger.info("-" * 100)
-        logger.info("")
         
         report = self.generate_report(analysis_results, output_path)
         
         total_time = time.time() - total_start
         
-        logger.info("")
         logger.info("=" * 100)
         logger.info("BENCHMARKING COMPLETE")
         logger.info("=" * 100)
@@ -412,7 +666,6 @@ class EmotionBenchmarker:
         logger.info(f"Successful generations: {len([r for r in all_results if r.get('success')])}")
         logger.info(f"Successful analyses: {len(analysis_results)}")
         logger.info(f"Report saved to: {output_path / 'benchmark_report.json'}")
-        logger.info("")
         
         return analysis_results, report
     
@@ -427,49 +680,51 @@ class EmotionBenchmarker:
             "comparisons": []
         }
         
-        # Group by emotion
-        by_emotion = defaultdict(list)
-        for result in results:
-            emotion_name = result["config"]["name"]
-            by_emotion[emotion_name].append(result)
-        
-        # Calculate statistics per emotion
-        for emotion, samples in by_emotion.items():
-            if not samples or not any(s.get("features") for s in samples):
-                continue
+        # One row per analyzed sample: (expressiveness, pitch variation, energy dynamics)
+        analyzed = [r for r in results if r.get("features")]
+        if analyzed:
+            names = np.array([r["config"]["name"] for r in analyzed])
+            metrics = np.array([
+                (r["features"]["expressiveness_score"],
+                 r["features"]["pitch"]["pitch_variation"],
+                 r["features"]["energy"]["energy_dynamics"])
+                for r in analyzed
+            ])
             
-            expressiveness_scores = [s["features"]["expressiveness_score"] for s in samples if s.get("features")]
-            pitch_variations = [s["features"]["pitch"]["pitch_variation"] for s in samples if s.get("features")]
-            energy_dynamics = [s["features"]["energy"]["energy_dynamics"] for s in samples if s.get("features")]
+            # Group by emotion, keeping emotions in first-seen order
+            emotions, first_seen, inverse, counts = np.unique(
+                names, return_index=True, return_inverse=True, return_counts=True
+            )
+            order = np.argsort(first_seen)
+            sums = np.zeros((len(emotions), metrics.shape[1]))
+            np.add.at(sums, inverse, metrics)
+            means = (sums / counts[:, None])[order]
+            emotions = emotions[order]
+            counts = counts[order]
             
-            report["emotions_tested"][emotion] = {
-                "count": len(samples),
-                "avg_expressiveness": float(sum(expressiveness_scores) / len(expressiveness_scores)) if expressiveness_scores else 0.0,
-                "avg_pitch_variation": float(sum(pitch_variations) / len(pitch_variations)) if pitch_variations else 0.0,
-                "avg_energy_dynamics": float(sum(energy_dynamics) / len(energy_dynamics)) if energy_dynamics else 0.0,
-            }
-        
-        # Overall statistics
-        all_expressiveness = [r["features"]["expressiveness_score"] for r in results if r.get("features")]
-        if all_expressiveness:
-            import numpy as np
+            # Calculate statistics per emotion
+            for emotion, count, (avg_expr, avg_pitch, avg_energy) in zip(emotions, counts, means):
+                report["emotions_tested"][str(emotion)] = {
+                    "count": int(count),
+                    "avg_expressiveness": float(avg_expr),
+                    "avg_pitch_variation": float(avg_pitch),
+                    "avg_energy_dynamics": float(avg_energy),
+                }
+            
+            # Overall statistics
+            expressiveness = metrics[:, 0]
             report["statistics"] = {
-                "avg_expressiveness": float(np.mean(all_expressiveness)),
-                "std_expressiveness": float(np.std(all_expressiveness)),
-                "min_expressiveness": float(np.min(all_expressiveness)),
-                "max_expressiveness": float(np.max(all_expressiveness)),
+                "avg_expressiveness": float(expressiveness.mean()),
+                "std_expressiveness": float(expressiveness.std()),
+                "min_expressiveness": float(expressiveness.min()),
+                "max_expressiveness": float(expressiveness.max()),
             }
-        
-        # Rankings
-        if all_expressiveness:
-            sorted_emotions = sorted(
-                report["emotions_tested"].items(),
-                key=lambda x: x[1]["avg_expressiveness"],
-                reverse=True
-            )
+            
+            # Rankings (stable, so ties keep first-seen order)
+            ranked = [str(e) for e in emotions[np.argsort(-means[:, 0], kind='stable')]]
             report["rankings"] = {
-                "most_expressive": [e[0] for e in sorted_emotions[:5]],
-                "least_expressive": [e[0] for e in sorted_emotions[-5:]],
+                "most_expressive": ranked[:5],
+                "least_expressive": ranked[-5:],
             }
         
         # Detailed results
@@ -487,21 +742,17 @@ class EmotionBenchmarker:
         
         # Save report
         report_path = output_dir / "benchmark_report.json"
-        with open(report_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        _write_json(report_path, report)
         
         logger.info(f"✅ Report saved to: {report_path}")
         
         # Print summary
-        logger.info("")
         logger.info("BENCHMARK SUMMARY:")
-        logger.info("")
         if report["rankings"].get("most_expressive"):
             logger.info("Most expressive emotions:")
             for i, emotion in enumerate(report["rankings"]["most_expressive"][:5], 1):
                 score = report["emotions_tested"][emotion]["avg_expressiveness"]
                 logger.info(f"  {i}. {emotion}: {score:.2f}")
-            logger.info("")
         
         return report
 
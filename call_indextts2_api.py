@@ -4,25 +4,118 @@ Call IndexTTS2 Hugging Face Spaces API
 Uses the IndexTTS2 demo API for emotion-controlled voice synthesis.
 """
 
+import asyncio
+import functools
+import hashlib
 import logging
 import os
+import re
+import shutil
 import sys
+import threading
 import time
 from pathlib import Path
 from datetime import datetime
+from types import MappingProxyType
+
+import requests
+from requests.adapters import HTTPAdapter
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)-8s | [%(filename)s:%(lineno)d] | %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 logger = logging.getLogger(__name__)
 
-def call_indextts2_api(
+SPACE_ID = "IndexTeam/IndexTTS-2-Demo"
+
+_RULE = "=" * 100
+
+# Order of the /gen_single vec1..vec8 emotion sliders
+EMOTION_ORDER = ("happy", "angry", "sad", "afraid", "disgusted", "melancholic", "surprised", "calm")
+_ZERO_VECS = (0,) * len(EMOTION_ORDER)
+
+SPACE_URL = "https://indexteam-indextts-2-demo.hf.space"
+
+# Default /gen_single generation parameters (read-only; callers override per request)
+_DEFAULT_GEN_PARAMS = MappingProxyType({
+    "param_16": True,  # do_sample
+    "param_17": 0.8,   # top_p
+    "param_18": 30,    # top_k
+    "param_19": 0.8,   # temperature
+    "param_20": 0,     # length_penalty
+    "param_21": 3,     # num_beams
+    "param_22": 10,    # repetition_penalty
+    "param_23": 1500,  # max_mel_tokens
+})
+
+# Persistent cache of generated audio, keyed by reference audio content + request.
+# Set INDEXTTS2_CACHE_DIR to relocate it, or to an empty string to disable it.
+_AUDIO_CACHE_DIR = os.environ.get(
+    "INDEXTTS2_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "indextts2_api")
+)
+_AUDIO_CACHE_MAX_BYTES = 2 * 1024 ** 3  # least recently used files are evicted beyond this
+
+# Fallback error classification for exceptions that carry no type/status information
+_QUOTA_RE = re.compile(r"(quota|exceeded|rate.?limit|gpu.?time)", re.I)
+_AUTH_RE = re.compile(r"(unauthoriz|forbidden|auth|token|\b401\b|\b403\b)", re.I)
+
+# Keep-alive session shared by all result downloads (reuses the TLS connection to the Space)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+# Guards first-time Client creation when generations run concurrently
+_CLIENT_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client(space_id, hf_token=None):
+    """Connect to the Space once and reuse the Client (schema fetch + auth) across calls.
+    
+    The token is part of the cache key, so switching tokens reconnects.
+    """
+    from gradio_client import Client
+    return Client(space_id, token=hf_token)
+
+
+@functools.lru_cache(maxsize=32)
+def _handle_file_for(path, mtime_ns, size):
+    from gradio_client import handle_file
+    return handle_file(path)
+
+
+def _handle_file_cached(path):
+    """handle_file() memoized by (path, mtime, size) so an unchanged file is reused."""
+    stat = os.stat(path)
+    return _handle_file_for(path, stat.st_mtime_ns, stat.st_size)
+
+
+def _download(url, dest):
+    """Stream url to dest in 64 KiB chunks over the shared session; returns bytes written."""
+    total = 0
+    with _SESSION.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        with open(dest, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                f.write(chunk)
+                total += len(chunk)
+    return total
+
+
+@functools.lru_cache(maxsize=32)
+def _file_digest_for(path, mtime_ns, size):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_digest(path):
+    """Content hash of path, recomputed only when (mtime, size) changes."""
+    stat = os.stat(path)
+    return _file_digest_for(path, stat.st_mtime_ns, stat.st_size)
+
+
+def _audio_cache_path(
     voice_reference,
     text,
-    output_file,
     emo_control_method="Same as the voice reference",
     emotion_reference=None,
     emotion_weight=0.8,
@@ -31,48 +124,155 @@ def call_indextts2_api(
     max_text_tokens=120,
     **generation_params
 ):
-    """
-    Call IndexTTS2 API for voice synthesis with emotion control.
+    """Cache file for a _run_generation request (same arguments), or None if caching is off."""
+    if not _AUDIO_CACHE_DIR:
+        return None
+    key_parts = (
+        _file_digest(os.fspath(voice_reference)),
+        text,
+        emo_control_method,
+        _file_digest(os.fspath(emotion_reference)) if emotion_reference else None,
+        emotion_weight,
+        _emotion_vector_values(emotion_vectors),
+        emotion_text,
+        max_text_tokens,
+        sorted({**_DEFAULT_GEN_PARAMS, **generation_params}.items()),
+    )
+    key = hashlib.blake2b(repr(key_parts).encode("utf-8"), digest_size=20).hexdigest()
+    return os.path.join(_AUDIO_CACHE_DIR, key[:2], key + ".wav")
+
+
+def _load_cached_audio(output_file, request):
+    """Copy a cached generation for request to output_file; True on a cache hit."""
+    try:
+        cache_path = _audio_cache_path(**request)
+        if cache_path is None:
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+        shutil.copyfile(cache_path, output_file)
+    except OSError:
+        return False
+    os.utime(cache_path)  # mark as recently used for eviction
+    logger.info("♻️  Reused cached audio for %s: %s", os.path.basename(output_file), cache_path)
+    return True
+
+
+def _store_cached_audio(output_file, request):
+    """Add a freshly generated output_file to the audio cache, then evict down to the size cap."""
+    try:
+        cache_path = _audio_cache_path(**request)
+        if cache_path is None:
+            return
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(output_file, tmp_path)
+        os.replace(tmp_path, cache_path)
+        _evict_audio_cache()
+    except OSError as e:
+        logger.warning("⚠️  Could not cache generated audio: %s", e)
+
+
+def _evict_audio_cache():
+    entries = []
+    for root, _, files in os.walk(_AUDIO_CACHE_DIR):
+        for name in files:
+            if name.endswith(".wav"):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                entries.append((stat.st_atime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= _AUDIO_CACHE_MAX_BYTES:
+            break
+        os.remove(path)
+        total -= size
+
+
+def _extract_file_path(result):
+    """File path/URL from a /gen_single result, or None.
     
-    Args:
-        voice_reference: Path to voice reference audio file
-        text: Text to synthesize
-        output_file: Path to save output audio
-        emo_control_method: "Same as the voice reference", "Use emotion reference audio", or "Use emotion vectors"
-        emotion_reference: Path to emotion reference audio (if using emotion reference method)
-        emotion_weight: Emotion control weight (0.0-1.0)
-        emotion_vectors: Dict with keys: happy, angry, sad, afraid, disgusted, melancholic, surprised, calm (0.0-1.0)
-        emotion_text: Text description of emotion (if using text-based emotion)
-        max_text_tokens: Maximum tokens per generation segment
-        **generation_params: Additional generation parameters
+    Handles Gradio update/file dicts ('value', 'path', 'url', 'name'), FileData-like
+    objects with a .path, and plain path/URL strings.
     """
-    logger.info("=" * 100)
-    logger.info("CALLING INDEXTTS2 HUGGING FACE API")
-    logger.info("=" * 100)
-    logger.info("")
+    if isinstance(result, dict):
+        return result.get('value') or result.get('path') or result.get('url') or result.get('name')
+    return getattr(result, 'path', None) or (result if isinstance(result, str) else None)
+
+
+def _classify_error(error):
+    """Classify an API exception as "quota", "auth" or None, by type/HTTP status before message."""
+    from gradio_client.exceptions import AuthenticationError
+    from gradio_client.utils import TooManyRequestsError
+    
+    if isinstance(error, TooManyRequestsError):
+        return "quota"
+    if isinstance(error, AuthenticationError):
+        return "auth"
+    # HfHubHTTPError / requests-style errors expose the HTTP response
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return "quota"
+    if status in (401, 403):
+        return "auth"
+    
+    error_msg = str(error)
+    if _QUOTA_RE.search(error_msg):
+        return "quota"
+    if _AUTH_RE.search(error_msg):
+        return "auth"
+    return None
+
+
+def _emotion_vector_values(emotion_vectors):
+    """Emotion weights as a tuple in EMOTION_ORDER; accepts a dict, a ready tuple or None."""
+    if emotion_vectors is None:
+        return _ZERO_VECS
+    if isinstance(emotion_vectors, tuple):
+        return emotion_vectors
+    return tuple(emotion_vectors.get(k, 0) for k in EMOTION_ORDER)
+
+
+def submit_job(client, **inputs):
+    """Start a /gen_single job without blocking; returns a gradio_client Job."""
+    return client.submit(**inputs, api_name="/gen_single")
+
+
+def _run_generation(
+    voice_reference,
+    text,
+    emo_control_method="Same as the voice reference",
+    emotion_reference=None,
+    emotion_weight=0.8,
+    emotion_vectors=None,
+    emotion_text="",
+    max_text_tokens=120,
+    **generation_params
+):
+    """Submit one /gen_single request (with quota retries); returns (result, generation_time) or None."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("%s\nCALLING INDEXTTS2 HUGGING FACE API\n%s\n", _RULE, _RULE)
     
     try:
-        from gradio_client import Client, handle_file
+        import gradio_client  # noqa: F401
     except ImportError:
         logger.error("❌ gradio_client not installed!")
         logger.info("Install with: pip install gradio_client")
-        return False
+        return None
     
     # Validate inputs
-    voice_ref_path = Path(voice_reference)
-    if not voice_ref_path.exists():
-        logger.error(f"❌ Voice reference not found: {voice_reference}")
-        return False
+    vref_str = os.fspath(voice_reference)
+    if not os.path.exists(vref_str):
+        logger.error("❌ Voice reference not found: %s", voice_reference)
+        return None
     
-    logger.info(f"Voice reference: {voice_ref_path.name}")
-    logger.info(f"Text: '{text}'")
-    logger.info(f"Emotion method: {emo_control_method}")
-    logger.info("")
-    
-    # Initialize client
-    logger.info("Connecting to IndexTTS2 API...")
-    logger.info("Space: IndexTeam/IndexTTS-2-Demo")
-    logger.info("")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Voice reference: %s", os.path.basename(vref_str))
+        logger.info("Text: '%s'", text)
+        logger.info("Emotion method: %s\n", emo_control_method)
+        
+        # Initialize client
+        logger.info("Connecting to IndexTTS2 API...")
+        logger.info("Space: %s\n", SPACE_ID)
     
     # Check for Hugging Face token
     hf_token = os.environ.get("HF_TOKEN") or os.environ.get("HUGGINGFACE_HUB_TOKEN")
@@ -86,67 +286,29 @@ def call_indextts2_api(
         logger.info("")
     
     try:
-        # Set token in environment if provided (gradio_client reads from env)
-        if hf_token:
-            os.environ["HF_TOKEN"] = hf_token
-            os.environ["HUGGINGFACE_HUB_TOKEN"] = hf_token
-            logger.info("Token set in environment variables")
-        
-        client = Client("IndexTeam/IndexTTS-2-Demo")
+        with _CLIENT_LOCK:
+            client = _get_client(SPACE_ID, hf_token=hf_token)
         logger.info("✅ Connected to API")
         if hf_token:
             logger.info("✅ Using authenticated access with token")
         logger.info("")
     except Exception as e:
-        logger.error(f"❌ Failed to connect to API: {e}")
+        logger.error("❌ Failed to connect to API: %s", e)
         logger.error("")
         logger.error("Full error details:")
         import traceback
         logger.error(traceback.format_exc())
-        return False
+        return None
     
-    # Prepare emotion vectors (default to all zeros)
-    if emotion_vectors is None:
-        emotion_vectors = {
-            "happy": 0,
-            "angry": 0,
-            "sad": 0,
-            "afraid": 0,
-            "disgusted": 0,
-            "melancholic": 0,
-            "surprised": 0,
-            "calm": 0
-        }
+    # Map emotion vectors to API format (vec1..vec8 in EMOTION_ORDER, default 0)
+    vec_values = _emotion_vector_values(emotion_vectors)
+    vec_kwargs = {f"vec{i}": v for i, v in enumerate(vec_values, 1)}
     
-    # Map emotion vectors to API format
-    vec1 = emotion_vectors.get("happy", 0)
-    vec2 = emotion_vectors.get("angry", 0)
-    vec3 = emotion_vectors.get("sad", 0)
-    vec4 = emotion_vectors.get("afraid", 0)
-    vec5 = emotion_vectors.get("disgusted", 0)
-    vec6 = emotion_vectors.get("melancholic", 0)
-    vec7 = emotion_vectors.get("surprised", 0)
-    vec8 = emotion_vectors.get("calm", 0)
-    
-    # Handle emotion reference
-    if emotion_reference:
-        emo_ref_path = handle_file(str(emotion_reference))
-    else:
-        # Use voice reference as default
-        emo_ref_path = handle_file(str(voice_ref_path))
-    
-    # Default generation parameters
-    default_params = {
-        "param_16": True,  # do_sample
-        "param_17": 0.8,   # top_p
-        "param_18": 30,    # top_k
-        "param_19": 0.8,   # temperature
-        "param_20": 0,     # length_penalty
-        "param_21": 3,     # num_beams
-        "param_22": 10,    # repetition_penalty
-        "param_23": 1500,  # max_mel_tokens
-    }
-    default_params.update(generation_params)
+    # Reference audio handles; the voice reference doubles as the default emotion reference
+    prompt_file = _handle_file_cached(vref_str)
+    emo_ref_path = _handle_file_cached(os.fspath(emotion_reference)) if emotion_reference else prompt_file
+    
+    default_params = {**_DEFAULT_GEN_PARAMS, **generation_params}
     
     # Call API
     logger.info("Calling /gen_single endpoint...")
@@ -160,26 +322,20 @@ def call_indextts2_api(
     
     for attempt in range(max_retries):
         try:
-            result = client.predict(
+            job = submit_job(
+                client,
                 emo_control_method=emo_control_method,
-                prompt=handle_file(str(voice_ref_path)),
+                prompt=prompt_file,
                 text=text,
                 emo_ref_path=emo_ref_path,
                 emo_weight=emotion_weight,
-                vec1=vec1,
-                vec2=vec2,
-                vec3=vec3,
-                vec4=vec4,
-                vec5=vec5,
-                vec6=vec6,
-                vec7=vec7,
-                vec8=vec8,
+                **vec_kwargs,
                 emo_text=emotion_text,
                 emo_random=False,
                 max_text_tokens_per_segment=max_text_tokens,
-                **default_params,
-                api_name="/gen_single"
+                **default_params
             )
+            result = job.result()
             
             generation_time = time.time() - start_time
             break  # Success, exit retry loop
@@ -193,12 +349,13 @@ def call_indextts2_api(
             logger.error("=" * 100)
             logger.error("FULL API ERROR DETAILS")
             logger.error("=" * 100)
-            logger.error(f"Error Type: {error_type}")
-            logger.error(f"Error Message: {error_msg}")
+            logger.error("Error Type: %s", error_type)
+            logger.error("Error Message: %s", error_msg)
             logger.error("")
             
             # Check for specific error types
-            if "quota" in error_msg.lower() or "exceeded" in error_msg.lower():
+            error_kind = _classify_error(e)
+            if error_kind == "quota":
                 logger.error("ERROR TYPE: GPU Quota Exceeded")
                 logger.error("")
                 logger.error("This means:")
@@ -209,12 +366,12 @@ def call_indextts2_api(
                 
                 if attempt < max_retries - 1:
                     wait_time = retry_delay * (attempt + 1)
-                    logger.warning(f"⚠️  GPU quota exceeded. Waiting {wait_time} seconds before retry {attempt + 2}/{max_retries}...")
+                    logger.warning("⚠️  GPU quota exceeded. Waiting %s seconds before retry %s/%s...", wait_time, attempt + 2, max_retries)
                     logger.warning("Note: Free Hugging Face Spaces have limited GPU time")
                     time.sleep(wait_time)
                     continue
                 else:
-                    logger.error(f"❌ GPU quota exceeded after {max_retries} attempts")
+                    logger.error("❌ GPU quota exceeded after %s attempts", max_retries)
                     logger.error("")
                     logger.error("SOLUTIONS:")
                     logger.error("  1. Wait 10-30 minutes and try again (quota resets)")
@@ -223,8 +380,8 @@ def call_indextts2_api(
                     logger.error("     export HF_TOKEN='your_huggingface_token'")
                     logger.error("  4. Upgrade to Hugging Face Pro for more GPU time")
                     logger.error("")
-                    return False
-            elif "authentication" in error_msg.lower() or "token" in error_msg.lower() or "unauthorized" in error_msg.lower():
+                    return None
+            elif error_kind == "auth":
                 logger.error("ERROR TYPE: Authentication Issue")
                 logger.error("")
                 logger.error("This means:")
@@ -238,7 +395,7 @@ def call_indextts2_api(
                 logger.error("     export HF_TOKEN='your_token_here'")
                 logger.error("  3. Or pass it to the script")
                 logger.error("")
-                return False
+                return None
             else:
                 # Other error, don't retry
                 logger.error("ERROR TYPE: Unknown/Other")
@@ -248,89 +405,59 @@ def call_indextts2_api(
                 logger.error(traceback.format_exc())
                 raise
     
-    # Download result (only if we got a result)
+    return result, generation_time
+
+
+def fetch_result(result, output_file, generation_time):
+    """Save a /gen_single result (URL or Space-local path) to output_file."""
     try:
-        # Download result
         logger.info("Downloading generated audio...")
         output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Result can be a dict with file info or a file path
-        import urllib.request
-        import shutil
-        
-        file_path = None
-        
-        if isinstance(result, dict):
-            # Gradio file dict format - check multiple possible keys
-            if 'value' in result:
-                # Gradio update format: {'visible': True, 'value': '/path/to/file', '__type__': 'update'}
-                file_path = result['value']
-            elif 'path' in result:
-                file_path = result['path']
-            elif 'url' in result:
-                file_path = result['url']
-            elif 'name' in result:
-                file_path = result['name']
-            else:
-                logger.error(f"❌ Unexpected result dict structure: {result}")
-                logger.error("Available keys: " + ", ".join(result.keys()))
-                return False
-        elif hasattr(result, 'path'):
-            # FileData object
-            file_path = result.path
-        elif isinstance(result, str):
-            # Direct file path or URL
-            file_path = result
-        
+        file_path = _extract_file_path(result)
         if not file_path:
-            logger.error(f"❌ Could not extract file path from result: {result}")
+            logger.error("❌ Could not extract file path from result: %s", result)
+            if isinstance(result, dict):
+                logger.error("Available keys: %s", ", ".join(result.keys()))
             return False
         
-        logger.info(f"Extracted file path: {file_path}")
+        logger.info("Extracted file path: %s", file_path)
         
         # Download or copy file
         if file_path.startswith('http'):
             # URL - download it
-            logger.info(f"  Downloading from: {file_path}")
-            urllib.request.urlretrieve(file_path, str(output_path))
+            logger.info("  Downloading from: %s", file_path)
+            size = _download(file_path, output_file)
         else:
             # Local file path - copy it
-            logger.info(f"  Copying from: {file_path}")
-            if Path(file_path).exists():
-                shutil.copy(file_path, str(output_path))
-            else:
-                # Try to download from Gradio server
-                if not file_path.startswith('http'):
-                    # Construct URL
-                    base_url = "https://indexteam-indextts-2-demo.hf.space"
-                    if file_path.startswith('/'):
-                        file_url = base_url + file_path
-                    else:
-                        file_url = base_url + "/gradio_api/file=" + file_path
-                    logger.info(f"  Downloading from: {file_url}")
-                    urllib.request.urlretrieve(file_url, str(output_path))
+            logger.info("  Copying from: %s", file_path)
+            try:
+                shutil.copyfile(file_path, output_file)
+                size = os.stat(output_file).st_size
+            except FileNotFoundError:
+                # Not on this machine - download it from the Gradio server
+                if file_path.startswith('/'):
+                    file_url = SPACE_URL + file_path
                 else:
-                    urllib.request.urlretrieve(file_path, str(output_path))
+                    file_url = SPACE_URL + "/gradio_api/file=" + file_path
+                logger.info("  Downloading from: %s", file_url)
+                size = _download(file_url, output_file)
         
-        if output_path.exists():
-            size_mb = output_path.stat().st_size / (1024 * 1024)
-            logger.info("")
-            logger.info("=" * 100)
-            logger.info("GENERATION COMPLETE")
-            logger.info("=" * 100)
-            logger.info(f"Generation time: {generation_time:.2f} seconds")
-            logger.info(f"Output file: {output_path}")
-            logger.info(f"Output size: {size_mb:.2f} MB")
-            logger.info("")
+        if size:
+            size_mb = size / (1024 * 1024)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("\n%s\nGENERATION COMPLETE\n%s", _RULE, _RULE)
+                logger.info("Generation time: %.2f seconds", generation_time)
+                logger.info("Output file: %s", output_path)
+                logger.info("Output size: %.2f MB\n", size_mb)
             return True
         else:
-            logger.error(f"❌ Output file not created: {output_path}")
+            logger.error("❌ Output file not created or empty: %s", output_path)
             return False
             
     except Exception as e:
-        generation_time = time.time() - start_time
-        logger.error(f"❌ API call failed after {generation_time:.2f} seconds: {e}")
+        logger.error("❌ Failed to save generated audio: %s", e)
         import traceback
         logger.error(traceback.format_exc())
         logger.error("")
@@ -339,8 +466,111 @@ def call_indextts2_api(
         return False
 
 
-def generate_with_emotions(voice_reference, texts, output_dir="test_outputs/indextts2_api", **kwargs):
-    """Generate multiple samples with different emotion settings."""
+def call_indextts2_api(
+    voice_reference,
+    text,
+    output_file,
+    emo_control_method="Same as the voice reference",
+    emotion_reference=None,
+    emotion_weight=0.8,
+    emotion_vectors=None,
+    emotion_text="",
+    max_text_tokens=120,
+    **generation_params
+):
+    """
+    Call IndexTTS2 API for voice synthesis with emotion control.
+    
+    Args:
+        voice_reference: Path to voice reference audio file
+        text: Text to synthesize
+        output_file: Path to save output audio
+        emo_control_method: "Same as the voice reference", "Use emotion reference audio", or "Use emotion vectors"
+        emotion_reference: Path to emotion reference audio (if using emotion reference method)
+        emotion_weight: Emotion control weight (0.0-1.0)
+        emotion_vectors: Dict with keys: happy, angry, sad, afraid, disgusted, melancholic, surprised, calm (0.0-1.0),
+            or a tuple of those weights in EMOTION_ORDER
+        emotion_text: Text description of emotion (if using text-based emotion)
+        max_text_tokens: Maximum tokens per generation segment
+        **generation_params: Additional generation parameters
+    
+    Identical requests (same reference audio content, text, emotion settings and
+    generation parameters) are served from the on-disk cache in INDEXTTS2_CACHE_DIR.
+    """
+    request = dict(
+        voice_reference=voice_reference,
+        text=text,
+        emo_control_method=emo_control_method,
+        emotion_reference=emotion_reference,
+        emotion_weight=emotion_weight,
+        emotion_vectors=emotion_vectors,
+        emotion_text=emotion_text,
+        max_text_tokens=max_text_tokens,
+        **generation_params
+    )
+    if _load_cached_audio(output_file, request):
+        return True
+    
+    generated = _run_generation(**request)
+    if generated is None:
+        return False
+    result, generation_time = generated
+    success = fetch_result(result, output_file, generation_time)
+    if success:
+        _store_cached_audio(output_file, request)
+    return success
+
+
+async def _generate_grid(jobs, max_parallel):
+    """Generate each (output_file, request kwargs) job, at most max_parallel in flight.
+    
+    Only the remote generation holds a slot: the download runs after the slot
+    is released, so the next job is already submitted while this one saves.
+    Returns (success, seconds) per job, timed from when it got a slot.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_parallel)
+    
+    async def run(output_file, request):
+        start = time.time()
+        if await loop.run_in_executor(None, _load_cached_audio, output_file, request):
+            return True, time.time() - start
+        async with semaphore:
+            start = time.time()
+            logger.info("Generating: %s", os.path.splitext(os.path.basename(output_file))[0])
+            generated = await loop.run_in_executor(None, functools.partial(_run_generation, **request))
+        if generated is None:
+            return False, time.time() - start
+        result, generation_time = generated
+        success = await loop.run_in_executor(None, fetch_result, result, output_file, generation_time)
+        if success:
+            await loop.run_in_executor(None, _store_cached_audio, output_file, request)
+        return success, time.time() - start
+    
+    return await asyncio.gather(*(run(output_file, request) for output_file, request in jobs))
+
+
+def call_indextts2_api_many(jobs, max_parallel=4):
+    """
+    Run several call_indextts2_api requests concurrently.
+    
+    Args:
+        jobs: Iterable of (output_file, kwargs) pairs; kwargs are call_indextts2_api's
+            arguments other than output_file
+        max_parallel: Maximum number of requests in flight at the Space
+    
+    Returns a (success, seconds) tuple per job, in job order.
+    """
+    jobs = [(str(output_file), request) for output_file, request in jobs]
+    return asyncio.run(_generate_grid(jobs, max_parallel))
+
+
+def generate_with_emotions(voice_reference, texts, output_dir="test_outputs/indextts2_api", max_parallel=4, **kwargs):
+    """Generate multiple samples with different emotion settings.
+    
+    Requests are network/remote-GPU bound, so up to max_parallel of them
+    are kept in flight at once.
+    """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
@@ -374,37 +604,48 @@ def generate_with_emotions(voice_reference, texts, output_dir="test_outputs/inde
             "emotion_vectors": {"angry": 0.8}
         }
     ]
+    for config in emotion_configs:
+        config["emotion_vectors"] = _emotion_vector_values(config["emotion_vectors"])
     
-    for i, text in enumerate(texts, 1):
-        for config in emotion_configs:
-            output_file = output_path / f"test_{i:02d}_{config['name']}.wav"
-            
-            logger.info(f"Generating: test_{i:02d}_{config['name']}")
-            
-            success = call_indextts2_api(
-                voice_reference=voice_reference,
-                text=text,
-                output_file=str(output_file),
-                emo_control_method=config["emo_control_method"],
-                emotion_vectors=config.get("emotion_vectors"),
-                **kwargs
-            )
-            
-            if success:
-                results.append({
-                    "text_number": i,
-                    "emotion": config["name"],
-                    "output_file": str(output_file),
-                    "success": True
-                })
-            
-            logger.info("")
+    grid = [
+        (i, text, config, output_path / f"test_{i:02d}_{config['name']}.wav")
+        for i, text in enumerate(texts, 1)
+        for config in emotion_configs
+    ]
+    jobs = [
+        (str(output_file), dict(
+            voice_reference=voice_reference,
+            text=text,
+            emo_control_method=config["emo_control_method"],
+            emotion_vectors=config["emotion_vectors"],
+            **kwargs
+        ))
+        for i, text, config, output_file in grid
+    ]
+    
+    outcomes = call_indextts2_api_many(jobs, max_parallel)
+    
+    for (i, _, config, output_file), (success, _) in zip(grid, outcomes):
+        if success:
+            results.append({
+                "text_number": i,
+                "emotion": config["name"],
+                "output_file": str(output_file),
+                "success": True
+            })
     
     return results
 
 
 def main():
     """Main function."""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s | %(levelname)-8s | [%(filename)s:%(lineno)d] | %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
     import argparse
     
     parser = argparse.ArgumentParser(description="Call IndexTTS2 Hugging Face API")
@@ -3,6 +3,9 @@ Quick installation check script.
 Run this anytime to verify everything is set up correctly.
 """
 
+import importlib.metadata
+import importlib.util
+import subprocess
 import sys
 import os
 
@@ -48,29 +51,49 @@ def check_installation():
     
     all_ok = True
     for name, module in packages.items():
-        try:
-            mod = __import__(module)
-            version = getattr(mod, '__version__', 'unknown')
-            print(f"   ✅ {name}: {version}")
-        except ImportError:
+        # find_spec/metadata avoid executing the package (torch alone takes seconds and hundreds of MB)
+        if importlib.util.find_spec(module) is None:
             print(f"   ❌ {name}: NOT INSTALLED")
             all_ok = False
+            continue
+        try:
+            version = importlib.metadata.version(name)
+        except importlib.metadata.PackageNotFoundError:
+            version = getattr(__import__(module), '__version__', 'unknown')
+        print(f"   ✅ {name}: {version}")
     
     print()
     
     # Test TTS import
     print("4. Testing TTS import...")
     try:
-        from TTS.api import TTS
+        tts_spec = importlib.util.find_spec("TTS.api")
+    except ModuleNotFoundError:
+        tts_spec = None
+    if tts_spec is None:
+        print("   ❌ TTS import/initialization failed: TTS.api not found")
+        all_ok = False
+    else:
         print("   ✅ TTS can be imported")
         
-        # Try to initialize (this may take a moment)
+        # Initialize in a throwaway interpreter so torch/CUDA never load into this process
         print("   Testing TTS initialization...")
-        tts = TTS()
-        print("   ✅ TTS initialized successfully")
-    except Exception as e:
-        print(f"   ❌ TTS import/initialization failed: {e}")
-        all_ok = False
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-c", "import sys; from TTS.api import TTS; TTS(); sys.exit(0)"],
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+            if proc.returncode == 0:
+                print("   ✅ TTS initialized successfully")
+            else:
+                error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+                print(f"   ❌ TTS import/initialization failed: {error}")
+                all_ok = False
+        except subprocess.TimeoutExpired:
+            print("   ❌ TTS import/initialization failed: timed out after 60 seconds")
+            all_ok = False
     
     print()
     
@@ -4,9 +4,13 @@ Download audio from YouTube channel for voice cloning training.
 Uses yt-dlp for reliable downloads.
 """
 
+import json
 import logging
 import os
+import shutil
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import subprocess
 
@@ -18,6 +22,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Videos downloaded at the same time, one YoutubeDL per worker
+DOWNLOAD_WORKERS = 4
+
 def check_yt_dlp():
     """Check if yt-dlp is installed."""
     try:
@@ -34,6 +41,44 @@ def check_yt_dlp():
             logger.error(f"❌ Failed to install yt-dlp: {e}")
             return False
 
+def list_channel_videos(yt_dlp, channel_url, max_videos):
+    """
+    URLs of up to max_videos videos in a channel/playlist, from a flat listing.
+    
+    A flat listing only reads the playlist pages (no per-video metadata). A channel
+    root URL lists its tabs rather than videos, so the Videos tab (or the first tab)
+    is listed in its place. Returns an empty list when the URL is a single video.
+    """
+    opts = {
+        'quiet': True,
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+        'playlistend': max_videos,
+        'ignoreerrors': True,
+    }
+    
+    def flat_listing(ydl, url):
+        urls, tabs = [], []
+        info = ydl.extract_info(url, download=False)
+        for entry in (info or {}).get('entries') or []:
+            if not entry or not entry.get('url'):
+                continue
+            if entry.get('ie_key') == 'YoutubeTab':
+                tabs.append(entry['url'])
+                continue
+            urls.append(entry['url'])
+            if len(urls) >= max_videos:
+                break
+        return urls, tabs
+    
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        urls, tabs = flat_listing(ydl, channel_url)
+        if not urls and tabs:
+            videos_tab = next((tab for tab in tabs if tab.rstrip('/').endswith('/videos')), tabs[0])
+            urls, _ = flat_listing(ydl, videos_tab)
+    return urls
+
+
 def download_channel_audio(channel_url, output_dir="audio_samples", max_videos=10):
     """
     Download audio from a YouTube channel.
@@ -59,57 +104,84 @@ def download_channel_audio(channel_url, output_dir="audio_samples", max_videos=1
     logger.info(f"Max videos: {max_videos}")
     logger.info("")
     
+    # Count downloads as they finish (hooks fire from every worker thread) and record
+    # each file's original title in manifest.jsonl, since files are named by video ID
+    counters = {'downloaded': 0}
+    counters_lock = threading.Lock()
+    manifest_path = output_path / "manifest.jsonl"
+    
+    def count_finished(d):
+        if d['status'] == 'finished':
+            info = d.get('info_dict', {})
+            entry = {
+                'id': info.get('id'),
+                'title': info.get('title'),
+                'duration': info.get('duration'),
+                'file': os.path.basename(d.get('filename', '')),
+            }
+            with counters_lock:
+                counters['downloaded'] += 1
+                downloaded = counters['downloaded']
+                with open(manifest_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            logger.info(f"  Downloaded video {downloaded}/{max_videos}: {entry['title']}")
+    
     # Configure yt-dlp options
     ydl_opts = {
-        'format': 'bestaudio[ext=m4a]/bestaudio/best',
-        'outtmpl': str(output_path / '%(title)s.%(ext)s'),
+        # Keep the source audio stream as-is (no ffmpeg transcode to WAV); the analysis,
+        # refinement and cloning scripts decode/resample m4a/opus on load
+        'format': 'bestaudio[ext=m4a]/bestaudio',
+        'outtmpl': str(output_path / '%(id)s.%(ext)s'),  # ASCII, fixed-length names
         'quiet': False,
         'no_warnings': False,
         'ignoreerrors': True,
-        'extractaudio': True,
-        'audioformat': 'wav',
-        'audioquality': '0',  # Best quality
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'wav',
-            'preferredquality': '192',
-        }],
+        'writethumbnail': False,
+        'writesubtitles': False,
         'playlistend': max_videos,  # Limit number of videos
+        'lazy_playlist': True,  # Stream entries and stop after max_videos
+        'progress_hooks': [count_finished],
+        'concurrent_fragment_downloads': 8,
     }
+    if shutil.which('aria2c'):
+        # Parallel HTTP range requests per file
+        ydl_opts['external_downloader'] = {'default': 'aria2c'}
+        ydl_opts['external_downloader_args'] = {'aria2c': ['-x', '8', '-s', '8', '-k', '1M']}
     
-    try:
+    def download_batch(urls):
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            logger.info("Extracting channel information...")
-            # Extract info without downloading first
-            info = ydl.extract_info(channel_url, download=False)
-            
-            if 'entries' in info:
-                logger.info(f"Found {len(info['entries'])} videos in channel")
-                logger.info(f"Downloading up to {max_videos} videos...")
-            else:
-                logger.info("Processing single video/channel...")
-            
-            # Now download
-            ydl.download([channel_url])
-            
-            logger.info("✅ Download completed!")
-            
-            # List downloaded files
-            audio_files = list(output_path.glob("*.wav"))
-            if not audio_files:
-                audio_files = list(output_path.glob("*.m4a")) + list(output_path.glob("*.mp3"))
-            
-            logger.info("")
-            logger.info(f"Downloaded {len(audio_files)} audio files:")
-            for f in audio_files[:10]:  # Show first 10
-                size_mb = f.stat().st_size / (1024 * 1024)
-                logger.info(f"  - {f.name} ({size_mb:.2f} MB)")
-            
-            if len(audio_files) > 10:
-                logger.info(f"  ... and {len(audio_files) - 10} more files")
-            
-            return True
-            
+            ydl.download(urls)
+    
+    try:
+        logger.info(f"Downloading up to {max_videos} videos...")
+        video_urls = list_channel_videos(yt_dlp, channel_url, max_videos)
+        if len(video_urls) > 1:
+            # Fan the videos out so several downloads run at once
+            workers = min(DOWNLOAD_WORKERS, len(video_urls))
+            batches = [video_urls[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(download_batch, batches))
+        else:
+            download_batch([channel_url])
+        
+        logger.info(f"✅ Download completed! ({counters['downloaded']} videos)")
+        
+        # List downloaded files
+        audio_files = [
+            f for ext in ("m4a", "opus", "webm", "wav", "mp3")
+            for f in output_path.glob(f"*.{ext}")
+        ]
+        
+        logger.info("")
+        logger.info(f"Downloaded {len(audio_files)} audio files:")
+        for f in audio_files[:10]:  # Show first 10
+            size_mb = f.stat().st_size / (1024 * 1024)
+            logger.info(f"  - {f.name} ({size_mb:.2f} MB)")
+        
+        if len(audio_files) > 10:
+            logger.info(f"  ... and {len(audio_files) - 10} more files")
+        
+        return True
+        
     except Exception as e:
         logger.error(f"❌ Download failed: {e}")
         import traceback
@@ -3,11 +3,11 @@ Example script for voice cloning using Coqui XTTS
 This is the easiest option to get started with voice cloning.
 """
 
+import importlib.util
 import logging
 import os
 import sys
 import time
-from pathlib import Path
 from datetime import datetime
 
 # Configure detailed logging FIRST (before any imports that might fail)
@@ -22,14 +22,20 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Try to import audio metadata libraries
+# librosa is only needed when soundfile can't read a file, and importing it pulls in
+# numba/scipy/sklearn, so just check that it is installed and import it on demand
+LIBROSA_AVAILABLE = importlib.util.find_spec("librosa") is not None
+if LIBROSA_AVAILABLE:
+    logger.info("✅ librosa available")
+else:
+    logger.warning("⚠️  librosa not available - audio metadata will be limited")
+
+# soundfile reads audio headers without decoding the samples
 try:
-    import librosa
-    LIBROSA_AVAILABLE = True
-    logger.info("✅ librosa imported successfully")
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
 except ImportError:
-    LIBROSA_AVAILABLE = False
-    logger.warning("⚠️  librosa not available - audio metadata will be limited")
+    SOUNDFILE_AVAILABLE = False
 
 # Try to import TTS
 try:
@@ -80,34 +86,58 @@ def log_audio_file_info(audio_path):
     logger.info("AUDIO FILE ANALYSIS")
     logger.info("=" * 80)
     
-    if not os.path.exists(audio_path):
+    # One stat answers both "does it exist" and "how big is it"
+    try:
+        st = os.stat(audio_path)
+    except FileNotFoundError:
         logger.error(f"Audio file does not exist: {audio_path}")
         return False
     
     # Basic file info
-    file_path = Path(audio_path)
-    file_size = os.path.getsize(audio_path)
+    path_str = os.fspath(audio_path)
+    file_size = st.st_size
     file_size_mb = file_size / (1024 * 1024)
     
-    logger.info(f"File Path: {audio_path}")
-    logger.info(f"File Exists: {os.path.exists(audio_path)}")
+    logger.info(f"File Path: {path_str}")
+    logger.info("File Exists: True")
     logger.info(f"File Size: {file_size:,} bytes ({file_size_mb:.2f} MB)")
-    logger.info(f"File Extension: {file_path.suffix}")
-    logger.info(f"File Name: {file_path.name}")
-    logger.info(f"Absolute Path: {os.path.abspath(audio_path)}")
+    logger.info(f"File Extension: {os.path.splitext(path_str)[1]}")
+    logger.info(f"File Name: {os.path.basename(path_str)}")
+    logger.info(f"Absolute Path: {os.path.abspath(path_str)}")
     
-    # Audio metadata if librosa is available
-    if LIBROSA_AVAILABLE:
+    # Audio metadata: header only via soundfile, full decode via librosa as a fallback
+    if SOUNDFILE_AVAILABLE or LIBROSA_AVAILABLE:
         try:
-            logger.info("Loading audio metadata with librosa...")
-            y, sr = librosa.load(audio_path, sr=None)
-            duration = len(y) / sr
+            info = None
+            if SOUNDFILE_AVAILABLE:
+                try:
+                    logger.info("Reading audio metadata with soundfile...")
+                    info = sf.info(audio_path)
+                except Exception as e:
+                    if not LIBROSA_AVAILABLE:
+                        raise
+                    logger.debug(f"soundfile could not read header ({e}), falling back to librosa")
+            
+            if info is not None:
+                sr = info.samplerate
+                duration = info.duration
+                num_samples = info.frames
+                channels = info.channels
+                data_type = info.subtype
+            else:
+                logger.info("Loading audio metadata with librosa...")
+                import librosa
+                y, sr = librosa.load(audio_path, sr=None)
+                duration = len(y) / sr
+                num_samples = len(y)
+                channels = 1
+                data_type = y.dtype
             
             logger.info(f"Sample Rate: {sr} Hz")
             logger.info(f"Duration: {duration:.2f} seconds")
-            logger.info(f"Number of Samples: {len(y):,}")
-            logger.info(f"Audio Shape: {y.shape}")
-            logger.info(f"Audio Data Type: {y.dtype}")
+            logger.info(f"Number of Samples: {num_samples:,}")
+            logger.info(f"Channels: {channels}")
+            logger.info(f"Audio Data Type: {data_type}")
             
             # Check if duration is sufficient
             if duration < 3:
@@ -119,7 +149,7 @@ def log_audio_file_info(audio_path):
             logger.error(f"Error loading audio metadata: {e}")
             logger.warning("Continuing without detailed audio metadata...")
     else:
-        logger.warning("librosa not available - install with: pip install librosa")
+        logger.warning("soundfile/librosa not available - install with: pip install soundfile librosa")
     
     logger.info("=" * 80)
     return True
@@ -169,7 +199,14 @@ def clone_voice_with_xtts(text, speaker_audio_path, output_path, language="en"):
     
     model_load_start = time.time()
     try:
+        import torch
+        use_cuda = torch.cuda.is_available()
         tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
+        if use_cuda:
+            logger.info("Moving model to CUDA (FP16 autocast, TF32 matmuls)...")
+            tts = tts.to("cuda")
+            torch.backends.cuda.matmul.allow_tf32 = True
+            torch.backends.cudnn.benchmark = True
         model_load_time = time.time() - model_load_start
         logger.info(f"✅ Model loaded successfully in {model_load_time:.2f} seconds")
     except Exception as e:
@@ -198,12 +235,13 @@ def clone_voice_with_xtts(text, speaker_audio_path, output_path, language="en"):
     generation_start = time.time()
     try:
         logger.info("Calling tts.tts_to_file()...")
-        tts.tts_to_file(
-            text=text,
-            speaker_wav=speaker_audio_path,
-            language=language,
-            file_path=output_path
-        )
+        with torch.inference_mode(), torch.autocast("cuda", dtype=torch.float16, enabled=use_cuda):
+            tts.tts_to_file(
+                text=text,
+                speaker_wav=speaker_audio_path,
+                language=language,
+                file_path=output_path
+            )
         generation_time = time.time() - generation_start
         logger.info(f"✅ Speech generation completed in {generation_time:.2f} seconds")
     except Exception as e:
@@ -216,15 +254,28 @@ def clone_voice_with_xtts(text, speaker_audio_path, output_path, language="en"):
     # Step 5: Verify output file
     logger.info("")
     logger.info("STEP 5: Verifying output file...")
-    if os.path.exists(output_path):
-        output_size = os.path.getsize(output_path)
+    try:
+        output_stat = os.stat(output_path)
+    except FileNotFoundError:
+        output_stat = None
+    output_abspath = os.path.abspath(output_path)
+    if output_stat is not None:
+        output_size = output_stat.st_size
         output_size_mb = output_size / (1024 * 1024)
         logger.info(f"✅ Output file created successfully")
-        logger.info(f"Output Path: {os.path.abspath(output_path)}")
+        logger.info(f"Output Path: {output_abspath}")
         logger.info(f"Output Size: {output_size:,} bytes ({output_size_mb:.2f} MB)")
         
-        if LIBROSA_AVAILABLE:
+        if SOUNDFILE_AVAILABLE:
+            try:
+                info = sf.info(output_path)
+                logger.info(f"Output Duration: {info.duration:.2f} seconds")
+                logger.info(f"Output Sample Rate: {info.samplerate} Hz")
+            except Exception as e:
+                logger.warning(f"Could not analyze output audio: {e}")
+        elif LIBROSA_AVAILABLE:
             try:
+                import librosa
                 y, sr = librosa.load(output_path, sr=None)
                 duration = len(y) / sr
                 logger.info(f"Output Duration: {duration:.2f} seconds")
@@ -244,7 +295,7 @@ def clone_voice_with_xtts(text, speaker_audio_path, output_path, language="en"):
     logger.info(f"Total Processing Time: {total_time:.2f} seconds")
     logger.info(f"Model Load Time: {model_load_time:.2f} seconds")
     logger.info(f"Generation Time: {generation_time:.2f} seconds")
-    logger.info(f"Output File: {os.path.abspath(output_path)}")
+    logger.info(f"Output File: {output_abspath}")
     logger.info("=" * 80)
     
     return output_path
@@ -4,21 +4,102 @@ Generate Multiple Voice Clones
 Creates multiple cloned voice samples using the best refined audio.
 """
 
+import atexit
+import functools
+import gc
 import logging
 import os
+import queue
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
-# Configure extensive logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)-8s | [%(filename)s:%(lineno)d] | %(message)s',
+# Configure extensive logging; records are written to stdout by a background
+# QueueListener so the generation loop never blocks on console flushes
+_log_queue = queue.Queue(-1)
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(logging.Formatter(
+    '%(asctime)s | %(levelname)-8s | [%(filename)s:%(lineno)d] | %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
-)
+))
+_log_listener = QueueListener(_log_queue, _stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(QueueHandler(_log_queue))
 logger = logging.getLogger(__name__)
 
+def _parse_cpu_list(text):
+    """Expand a sysfs CPU list such as "0-7,16" into a set of CPU numbers."""
+    cpus = set()
+    for part in text.strip().split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.update(range(int(first), int(last) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+def _performance_cpus():
+    """Usable logical CPUs on performance cores, and whether the CPU is hybrid (P + E cores)."""
+    if hasattr(os, "sched_getaffinity"):
+        allowed = os.sched_getaffinity(0)
+    else:
+        allowed = set(range(os.cpu_count() or 1))
+    # Hybrid Intel CPUs expose their P-cores as the cpu_core PMU on Linux
+    try:
+        with open("/sys/devices/cpu_core/cpus") as f:
+            pcores = _parse_cpu_list(f.read()) & allowed
+        if pcores:
+            return pcores, pcores != allowed
+    except (OSError, ValueError):
+        pass
+    return allowed, False
+
+def _physical_core_count(cpus):
+    """Number of physical cores behind the logical CPUs (SMT siblings counted once)."""
+    cores = set()
+    for cpu in cpus:
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                cores.add(f.read().strip())
+        except OSError:
+            break
+    else:
+        return len(cores)
+    try:
+        import psutil
+        return psutil.cpu_count(logical=False) or len(cpus)
+    except ImportError:
+        return len(cpus)
+
+def _configure_cpu_threads():
+    """One OpenMP/MKL thread per physical P-core, pinned to the P-cores on hybrid Linux CPUs.
+    
+    Must run before numpy/torch are imported, since they size their thread pools
+    on import. Thread counts already set in the environment are left alone.
+    """
+    if "OMP_NUM_THREADS" in os.environ:
+        return
+    cpus, hybrid = _performance_cpus()
+    threads = str(_physical_core_count(cpus))
+    os.environ["OMP_NUM_THREADS"] = threads
+    os.environ.setdefault("MKL_NUM_THREADS", threads)
+    if hybrid:
+        os.sched_setaffinity(0, cpus)
+        logger.info(f"CPU inference: {threads} threads pinned to P-cores {sorted(cpus)}")
+    else:
+        logger.info(f"CPU inference: {threads} threads")
+
+_configure_cpu_threads()
+
+import numpy as np
+
 # Apply PyTorch patch
 try:
     import patch_torch_load
@@ -26,8 +107,249 @@ try:
 except Exception as e:
     logger.warning(f"Could not apply patch: {e}")
 
-def generate_clones(num_clones=10, reference_audio=None):
-    """Generate multiple voice clones."""
+XTTS_MODEL = "tts_models/multilingual/multi-dataset/xtts_v2"
+
+# Test phrases for variety (cycled when more clones than phrases are requested)
+TEST_PHRASES = (
+    "Hello, this is a voice cloning demonstration using advanced machine learning technology.",
+    "The quality of voice synthesis has improved dramatically in recent years.",
+    "This system can clone voices with just a few seconds of audio sample.",
+    "Voice cloning technology has many applications in content creation and accessibility.",
+    "The neural network analyzes voice characteristics and reproduces them accurately.",
+    "Modern text-to-speech systems can generate natural-sounding human voices.",
+    "This voice clone was created using refined audio samples for optimal quality.",
+    "Artificial intelligence continues to revolutionize how we interact with technology.",
+    "Voice synthesis technology enables new forms of creative expression and communication.",
+    "The future of voice technology holds exciting possibilities for innovation.",
+    "Machine learning models can learn to mimic human speech patterns remarkably well.",
+    "This demonstration showcases the capabilities of state-of-the-art voice cloning systems.",
+    "Audio processing and refinement ensure the highest quality voice replication.",
+    "The combination of deep learning and signal processing creates realistic voice synthesis.",
+    "Voice cloning technology opens doors to personalized content and accessibility tools.",
+    "Advanced algorithms analyze spectral characteristics to capture unique voice signatures.",
+    "This system processes audio through multiple refinement stages for optimal results.",
+    "The integration of neural networks and audio engineering produces impressive voice clones.",
+    "Voice synthesis technology continues to evolve with each new breakthrough.",
+    "This demonstration highlights the potential of AI-driven voice replication systems.",
+)
+
+# Loaded TTS instances keyed by (model name, device), so repeated calls reuse one model
+_TTS_CACHE = {}
+
+def _get_tts(model_name, device):
+    """Return a cached TTS instance for model_name on device, loading it on first use."""
+    key = (model_name, device)
+    if key not in _TTS_CACHE:
+        import torch
+        from TTS.api import TTS
+        
+        # Add safe globals
+        try:
+            from TTS.tts.configs.xtts_config import XttsConfig
+            torch.serialization.add_safe_globals([XttsConfig])
+        except:
+            pass
+        
+        logger.info("Loading XTTS model...")
+        _TTS_CACHE[key] = TTS(model_name, progress_bar=False).to(device)
+        logger.info("✅ XTTS model loaded")
+    return _TTS_CACHE[key]
+
+@atexit.register
+def _release_tts():
+    """Drop cached models and return their GPU memory at process exit."""
+    if not _TTS_CACHE:
+        return
+    _TTS_CACHE.clear()
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+def plan_batch(num_clones, num_phrases):
+    """Phrase index for every clone (clone i uses phrase (i - 1) % num_phrases), as int32."""
+    return np.arange(num_clones, dtype=np.int32) % np.int32(num_phrases)
+
+def _speaker_latents(xtts, reference_audio):
+    """Encode the reference voice once, with the same settings tts_to_file would use."""
+    config = xtts.config
+    return xtts.get_conditioning_latents(
+        audio_path=[str(reference_audio)],
+        gpt_cond_len=config.gpt_cond_len,
+        gpt_cond_chunk_len=config.gpt_cond_chunk_len,
+        max_ref_length=config.max_ref_len,
+        sound_norm_refs=config.sound_norm_refs,
+    )
+
+@functools.lru_cache(maxsize=256)
+def _tokenize(tokenizer, phrase, lang):
+    """Token IDs for phrase; phrases repeat once clones outnumber them, so cache per tokenizer."""
+    return tuple(tokenizer.encode(phrase, lang=lang))
+
+def _generate_codes(xtts, phrases, gpt_cond_latent):
+    """Generate audio codes for several phrases in one GPT decode.
+    
+    Each prefix (speaker conditioning + text) is left-padded to the longest one and
+    masked out. XTTS disables the GPT backbone's own position embeddings (text and
+    mel positions are embedded separately), so the padding does not shift anything.
+    Returns (text_tokens, codes) per phrase.
+    """
+    import torch
+    import torch.nn.functional as F
+    
+    config = xtts.config
+    gpt = xtts.gpt
+    device = gpt_cond_latent.device
+    
+    prefixes = []
+    tokens = []
+    with torch.no_grad():
+        for phrase in phrases:
+            text_tokens = torch.IntTensor(
+                _tokenize(xtts.tokenizer, phrase.strip().lower(), "en")
+            ).unsqueeze(0).to(device)
+            tokens.append(text_tokens)
+            text_inputs = F.pad(text_tokens, (0, 1), value=gpt.stop_text_token)
+            text_inputs = F.pad(text_inputs, (1, 0), value=gpt.start_text_token)
+            text_emb = gpt.text_embedding(text_inputs) + gpt.text_pos_embedding(text_inputs)
+            prefixes.append(torch.cat([gpt_cond_latent, text_emb], dim=1))
+        
+        prefix_len = max(prefix.shape[1] for prefix in prefixes)
+        batch = len(prefixes)
+        emb = torch.zeros(batch, prefix_len, prefixes[0].shape[-1], dtype=prefixes[0].dtype, device=device)
+        attention_mask = torch.ones(batch, prefix_len + 1, dtype=torch.long, device=device)
+        for row, prefix in enumerate(prefixes):
+            pad = prefix_len - prefix.shape[1]
+            emb[row, pad:] = prefix[0]
+            attention_mask[row, :pad] = 0
+        
+        gpt.gpt_inference.store_prefix_emb(emb)
+        gpt_inputs = torch.full((batch, prefix_len + 1), fill_value=1, dtype=torch.long, device=device)
+        gpt_inputs[:, -1] = gpt.start_audio_token
+        
+        generated = gpt.gpt_inference.generate(
+            gpt_inputs,
+            attention_mask=attention_mask,
+            bos_token_id=gpt.start_audio_token,
+            pad_token_id=gpt.stop_audio_token,
+            eos_token_id=gpt.stop_audio_token,
+            max_length=gpt.max_gen_mel_tokens + gpt_inputs.shape[-1],
+            do_sample=True,
+            temperature=config.temperature,
+            length_penalty=config.length_penalty,
+            repetition_penalty=config.repetition_penalty,
+            top_k=config.top_k,
+            top_p=config.top_p,
+            num_beams=1,
+            output_attentions=False,
+        )[:, gpt_inputs.shape[1]:]
+        
+        # Split back per phrase: shorter sequences are padded with the stop token
+        # after they finish, so keep everything up to and including the first one
+        coded = []
+        for row, text_tokens in enumerate(tokens):
+            codes = generated[row]
+            stops = (codes == gpt.stop_audio_token).nonzero()
+            if len(stops):
+                codes = codes[:int(stops[0]) + 1]
+            coded.append((text_tokens, codes.unsqueeze(0)))
+    return coded
+
+def _decode_codes(xtts, text_tokens, codes, gpt_cond_latent, speaker_embedding):
+    """Turn one phrase's audio codes into a waveform tensor (left on the model's device)."""
+    import torch
+    
+    gpt = xtts.gpt
+    device = gpt_cond_latent.device
+    with torch.no_grad():
+        gpt_latents = gpt(
+            text_tokens,
+            torch.tensor([text_tokens.shape[-1]], device=device),
+            codes,
+            torch.tensor([codes.shape[-1] * gpt.code_stride_len], device=device),
+            cond_latents=gpt_cond_latent,
+            return_attentions=False,
+            return_latent=True,
+        )
+        return xtts.hifigan_decoder(gpt_latents, g=speaker_embedding)
+
+def _synthesize_batch(xtts, phrases, gpt_cond_latent, speaker_embedding):
+    """Generate several phrases from precomputed speaker latents; one float32 waveform each."""
+    return [
+        _decode_codes(xtts, text_tokens, codes, gpt_cond_latent, speaker_embedding).float().cpu().numpy().squeeze()
+        for text_tokens, codes in _generate_codes(xtts, phrases, gpt_cond_latent)
+    ]
+
+def _compile_gpt(xtts):
+    """torch.compile the autoregressive GPT step once per loaded model.
+    
+    The HF KV cache grows every step, so the forward is compiled with dynamic
+    shapes instead of CUDA-graph "reduce-overhead" mode, which would re-record
+    a graph per sequence length.
+    """
+    import torch
+    inference = xtts.gpt.gpt_inference
+    if getattr(inference, "_compiled_forward", False):
+        return False
+    inference.forward = torch.compile(inference.forward, dynamic=True)
+    inference._compiled_forward = True
+    return True
+
+def _inference_context(use_cuda):
+    """inference_mode, plus FP16 autocast on CUDA (CPU stays in FP32)."""
+    import torch
+    stack = ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if use_cuda:
+        stack.enter_context(torch.autocast("cuda", dtype=torch.float16))
+    return stack
+
+def _to_samples(wav, ready=None):
+    """Host int16 PCM for a generated waveform, peak-normalized like Coqui's save_wav.
+    
+    wav may still be a device tensor being produced on another CUDA stream; ready
+    is the event recorded after it, waited on here so the caller never blocks.
+    """
+    if ready is not None:
+        ready.synchronize()
+    if hasattr(wav, "cpu"):
+        # float() undoes autocast's half precision
+        wav = wav.float().cpu().numpy().squeeze()
+    wav = np.asarray(wav, dtype=np.float32)
+    # Same scaling tts_to_file applied, so clone loudness matches the old output
+    wav_norm = wav * (32767 / max(0.01, float(np.max(np.abs(wav))) if wav.size else 0.0))
+    return wav_norm.astype(np.int16)
+
+def _write_wav(xtts, output_file, wav, ready=None):
+    """Write a generated waveform at the model's output sample rate."""
+    import soundfile as sf
+    sf.write(str(output_file), _to_samples(wav, ready), xtts.config.audio.output_sample_rate, subtype='PCM_16')
+
+def _append_wav(sound_file, wav, ready=None):
+    """Append a waveform to an open SoundFile; returns (start frame, frame count).
+    
+    The header is flushed after each clone so the file can be played while the
+    batch is still running.
+    """
+    samples = _to_samples(wav, ready)
+    start = sound_file.tell()
+    sound_file.write(samples)
+    sound_file.flush()
+    return start, len(samples)
+
+def generate_clones(num_clones=10, reference_audio=None, tts=None, batch_size=4, compile_gpt=True,
+                    single_file=False):
+    """Generate multiple voice clones.
+    
+    Pass an already loaded TTS instance as tts to skip model loading; otherwise
+    the module-level cached XTTS model is used. Clones are decoded batch_size
+    phrases at a time. On CUDA the GPT decoder is compiled with torch.compile
+    unless compile_gpt is False. With single_file, all clones are appended in
+    order to one batch.wav instead of one file per clone.
+    """
     
     logger.info("=" * 100)
     logger.info("GENERATING MULTIPLE VOICE CLONES")
@@ -60,19 +382,10 @@ def generate_clones(num_clones=10, reference_audio=None):
     
     # Load XTTS model
     try:
-        import torch
-        from TTS.api import TTS
-        
-        # Add safe globals
-        try:
-            from TTS.tts.configs.xtts_config import XttsConfig
-            torch.serialization.add_safe_globals([XttsConfig])
-        except:
-            pass
-        
-        logger.info("Loading XTTS model...")
-        tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2", progress_bar=True)
-        logger.info("✅ XTTS model loaded")
+        if tts is None:
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            tts = _get_tts(XTTS_MODEL, device)
         
     except Exception as e:
         logger.error(f"❌ Failed to load XTTS model: {e}")
@@ -80,29 +393,30 @@ def generate_clones(num_clones=10, reference_audio=None):
         logger.error(traceback.format_exc())
         return False
     
-    # Test phrases for variety
-    test_phrases = [
-        "Hello, this is a voice cloning demonstration using advanced machine learning technology.",
-        "The quality of voice synthesis has improved dramatically in recent years.",
-        "This system can clone voices with just a few seconds of audio sample.",
-        "Voice cloning technology has many applications in content creation and accessibility.",
-        "The neural network analyzes voice characteristics and reproduces them accurately.",
-        "Modern text-to-speech systems can generate natural-sounding human voices.",
-        "This voice clone was created using refined audio samples for optimal quality.",
-        "Artificial intelligence continues to revolutionize how we interact with technology.",
-        "Voice synthesis technology enables new forms of creative expression and communication.",
-        "The future of voice technology holds exciting possibilities for innovation.",
-        "Machine learning models can learn to mimic human speech patterns remarkably well.",
-        "This demonstration showcases the capabilities of state-of-the-art voice cloning systems.",
-        "Audio processing and refinement ensure the highest quality voice replication.",
-        "The combination of deep learning and signal processing creates realistic voice synthesis.",
-        "Voice cloning technology opens doors to personalized content and accessibility tools.",
-        "Advanced algorithms analyze spectral characteristics to capture unique voice signatures.",
-        "This system processes audio through multiple refinement stages for optimal results.",
-        "The integration of neural networks and audio engineering produces impressive voice clones.",
-        "Voice synthesis technology continues to evolve with each new breakthrough.",
-        "This demonstration highlights the potential of AI-driven voice replication systems.",
-    ]
+    # Every clone shares the reference, so run the speaker encoder once up front
+    try:
+        xtts = tts.synthesizer.tts_model
+        latents_start = time.time()
+        gpt_cond_latent, speaker_embedding = _speaker_latents(xtts, reference_audio)
+        logger.info(f"✅ Speaker latents computed ({time.time() - latents_start:.2f}s)")
+    except Exception as e:
+        logger.error(f"❌ Failed to compute speaker latents: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return False
+    
+    if compile_gpt and gpt_cond_latent.is_cuda:
+        try:
+            if _compile_gpt(xtts):
+                # Pay the compile cost here rather than inside the first timed clone
+                logger.info("Compiling XTTS GPT decoder (one-time warm-up)...")
+                compile_start = time.time()
+                with _inference_context(use_cuda=True):
+                    _synthesize_batch(xtts, ["Warming up."] * min(batch_size, num_clones), gpt_cond_latent, speaker_embedding)
+                logger.info(f"✅ GPT decoder compiled ({time.time() - compile_start:.2f}s)")
+        except Exception as e:
+            logger.warning(f"⚠️  torch.compile unavailable, using eager GPT decoder: {e}")
+            xtts.gpt.gpt_inference.__dict__.pop("forward", None)
     
     # Create output directory
     output_dir = Path("test_outputs/batch_clones")
@@ -116,42 +430,109 @@ def generate_clones(num_clones=10, reference_audio=None):
     results = []
     start_time = time.time()
     
-    for i in range(1, num_clones + 1):
-        phrase = test_phrases[(i - 1) % len(test_phrases)]
-        output_file = output_dir / f"clone_{i:03d}.wav"
-        
-        logger.info(f"[{i}/{num_clones}] Generating clone...")
-        logger.info(f"  Text: '{phrase[:60]}...'")
-        
-        clone_start = time.time()
-        try:
-            tts.tts_to_file(
-                text=phrase,
-                speaker_wav=str(reference_audio),
-                language="en",
-                file_path=str(output_file)
-            )
-            clone_time = time.time() - clone_start
+    # Which phrase each clone speaks, worked out once for the whole run
+    phrases_arr = np.array(TEST_PHRASES, dtype=object)
+    clone_phrases = phrases_arr[plan_batch(num_clones, len(TEST_PHRASES))]
+    
+    # Overlap work across batches: on CUDA the vocoder for batch N is queued on a
+    # side stream while batch N+1's GPT decode runs, and WAV writes happen on
+    # worker threads so neither waits for the disk
+    import torch
+    use_cuda = gpt_cond_latent.is_cuda
+    vocoder_stream = torch.cuda.Stream() if use_cuda else None
+    if use_cuda:
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.benchmark = True
+    pending = []
+    
+    combined = None
+    if single_file:
+        import soundfile as sf
+        combined_path = output_dir / "batch.wav"
+        combined = sf.SoundFile(str(combined_path), "w", samplerate=xtts.config.audio.output_sample_rate,
+                                channels=1, subtype='PCM_16')
+    
+    # A single writer keeps appends to batch.wav in clone order
+    with ThreadPoolExecutor(max_workers=1 if combined is not None else 2) as writer:
+        for batch_start in range(1, num_clones + 1, batch_size):
+            numbers = range(batch_start, min(batch_start + batch_size, num_clones + 1))
+            phrases = clone_phrases[numbers[0] - 1:numbers[-1]].tolist()
             
-            if output_file.exists():
-                size_mb = output_file.stat().st_size / (1024 * 1024)
-                logger.info(f"  ✅ Generated: {output_file.name} ({size_mb:.2f} MB, {clone_time:.2f}s)")
-                results.append({
-                    "number": i,
-                    "file": str(output_file),
-                    "text": phrase,
-                    "time": clone_time,
-                    "size_mb": size_mb
-                })
-            else:
-                logger.error(f"  ❌ File not created: {output_file}")
-                
+            for i, phrase in zip(numbers, phrases):
+                logger.debug(f"[{i}/{num_clones}] Generating clone...")
+                logger.debug(f"  Text: '{phrase[:60]}...'")
+            
+            batch_begin = time.time()
+            try:
+                with _inference_context(use_cuda):
+                    coded = _generate_codes(xtts, phrases, gpt_cond_latent)
+                    if vocoder_stream is not None:
+                        vocoder_stream.wait_stream(torch.cuda.current_stream())
+                        with torch.cuda.stream(vocoder_stream):
+                            for text_tokens, codes in coded:
+                                # Keep the allocator from recycling these while the side stream reads them
+                                text_tokens.record_stream(vocoder_stream)
+                                codes.record_stream(vocoder_stream)
+                            wavs = [_decode_codes(xtts, t, c, gpt_cond_latent, speaker_embedding) for t, c in coded]
+                        ready = vocoder_stream.record_event()
+                    else:
+                        wavs = [_decode_codes(xtts, t, c, gpt_cond_latent, speaker_embedding) for t, c in coded]
+                        ready = None
+            except Exception as e:
+                logger.error(f"  ❌ Generation failed for clones {numbers[0]}-{numbers[-1]}: {e}")
+                import traceback
+                logger.debug(traceback.format_exc())
+                logger.info("")
+                continue
+            # The batch shares one decode, so each clone is charged an equal share of it
+            clone_time = (time.time() - batch_begin) / len(phrases)
+            
+            for i, phrase, wav in zip(numbers, phrases, wavs):
+                if combined is not None:
+                    output_file = combined_path
+                    future = writer.submit(_append_wav, combined, wav, ready)
+                else:
+                    output_file = output_dir / f"clone_{i:03d}.wav"
+                    future = writer.submit(_write_wav, xtts, output_file, wav, ready)
+                pending.append((i, phrase, output_file, clone_time, future))
+    if combined is not None:
+        combined.close()
+    
+    # Surface vocoder/write errors once everything has been flushed
+    for i, phrase, output_file, clone_time, future in pending:
+        try:
+            span = future.result()
         except Exception as e:
-            logger.error(f"  ❌ Generation failed: {e}")
-            import traceback
-            logger.debug(traceback.format_exc())
+            logger.error(f"  ❌ Could not write {output_file}: {e}")
+            continue
         
-        logger.info("")
+        if combined is not None:
+            start, frames = span
+            sr = xtts.config.audio.output_sample_rate
+            size_mb = frames * 2 / (1024 * 1024)
+            logger.info(f"  ✅ Generated: clone {i} at {start / sr:.2f}s in {output_file.name} ({size_mb:.2f} MB, {clone_time:.2f}s)")
+            results.append({
+                "number": i,
+                "file": str(output_file),
+                "offset_seconds": start / sr,
+                "duration_seconds": frames / sr,
+                "text": phrase,
+                "time": clone_time,
+                "size_mb": size_mb
+            })
+        elif output_file.exists():
+            size_mb = output_file.stat().st_size / (1024 * 1024)
+            logger.info(f"  ✅ Generated: {output_file.name} ({size_mb:.2f} MB, {clone_time:.2f}s)")
+            results.append({
+                "number": i,
+                "file": str(output_file),
+                "text": phrase,
+                "time": clone_time,
+                "size_mb": size_mb
+            })
+        else:
+            logger.error(f"  ❌ File not created: {output_file}")
+    logger.info("")
     
     total_time = time.time() - start_time
     
@@ -177,9 +558,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate multiple voice clones")
     parser.add_argument("-n", "--num", type=int, default=10, help="Number of clones to generate (default: 10)")
     parser.add_argument("-r", "--reference", type=str, default=None, help="Path to reference audio file")
+    parser.add_argument("-b", "--batch-size", type=int, default=4, help="Clones decoded together per GPT batch (default: 4)")
+    parser.add_argument("--single-file", action="store_true", help="Append all clones to one batch.wav instead of separate files")
+    parser.add_argument("--no-compile", action="store_true", help="Skip torch.compile of the GPT decoder on CUDA")
     
     args = parser.parse_args()
     
-    success = generate_clones(num_clones=args.num, reference_audio=args.reference)
+    success = generate_clones(num_clones=args.num, reference_audio=args.reference, batch_size=args.batch_size, compile_gpt=not args.no_compile,
+                              single_file=args.single_file)
     sys.exit(0 if success else 1)
 
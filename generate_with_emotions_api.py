@@ -7,7 +7,6 @@ Uses the Hugging Face API to generate voice clones with various emotions.
 import logging
 import os
 import sys
-import time
 from pathlib import Path
 from datetime import datetime
 
@@ -20,10 +19,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Import the API caller
-from call_indextts2_api import call_indextts2_api
+from call_indextts2_api import call_indextts2_api_many
 
-def generate_emotion_samples(voice_reference, texts, output_dir="test_outputs/emotion_samples_api"):
-    """Generate samples with different emotions."""
+def generate_emotion_samples(voice_reference, texts, output_dir="test_outputs/emotion_samples_api", max_parallel=4):
+    """Generate samples with different emotions, up to max_parallel API requests at a time."""
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
@@ -63,43 +62,44 @@ def generate_emotion_samples(voice_reference, texts, output_dir="test_outputs/em
     
     results = []
     
-    for i, text in enumerate(texts, 1):
-        for emotion in emotions:
-            output_file = output_path / f"sample_{i:02d}_{emotion['name']}.wav"
-            
-            logger.info(f"Generating: sample_{i:02d}_{emotion['name']}")
-            logger.info(f"  Text: '{text[:60]}...'")
-            logger.info(f"  Emotion: {emotion['name']}")
-            logger.info("")
-            
-            start_time = time.time()
-            
-            success = call_indextts2_api(
-                voice_reference=voice_reference,
-                text=text,
-                output_file=str(output_file),
-                emo_control_method=emotion["method"],
-                emotion_vectors=emotion.get("vectors"),
-                emotion_weight=0.8
-            )
-            
-            gen_time = time.time() - start_time
-            
-            if success and output_file.exists():
-                size_mb = output_file.stat().st_size / (1024 * 1024)
-                results.append({
-                    "text_number": i,
-                    "emotion": emotion["name"],
-                    "output_file": str(output_file),
-                    "generation_time": gen_time,
-                    "size_mb": size_mb,
-                    "success": True
-                })
-                logger.info(f"  ✅ Generated in {gen_time:.2f}s ({size_mb:.2f} MB)")
-            else:
-                logger.warning(f"  ⚠️  Generation failed or file not created")
-            
-            logger.info("")
+    grid = [
+        (i, text, emotion, output_path / f"sample_{i:02d}_{emotion['name']}.wav")
+        for i, text in enumerate(texts, 1)
+        for emotion in emotions
+    ]
+    for i, text, emotion, output_file in grid:
+        logger.info(f"Queued: sample_{i:02d}_{emotion['name']}")
+        logger.info(f"  Text: '{text[:60]}...'")
+        logger.info(f"  Emotion: {emotion['name']}")
+    logger.info("")
+    
+    jobs = [
+        (output_file, dict(
+            voice_reference=voice_reference,
+            text=text,
+            emo_control_method=emotion["method"],
+            emotion_vectors=emotion.get("vectors"),
+            emotion_weight=0.8
+        ))
+        for i, text, emotion, output_file in grid
+    ]
+    outcomes = call_indextts2_api_many(jobs, max_parallel)
+    
+    for (i, text, emotion, output_file), (success, gen_time) in zip(grid, outcomes):
+        if success and output_file.exists():
+            size_mb = output_file.stat().st_size / (1024 * 1024)
+            results.append({
+                "text_number": i,
+                "emotion": emotion["name"],
+                "output_file": str(output_file),
+                "generation_time": gen_time,
+                "size_mb": size_mb,
+                "success": True
+            })
+            logger.info(f"  ✅ sample_{i:02d}_{emotion['name']} generated in {gen_time:.2f}s ({size_mb:.2f} MB)")
+        else:
+            logger.warning(f"  ⚠️  sample_{i:02d}_{emotion['name']}: generation failed or file not created")
+    logger.info("")
     
     # Summary
     logger.info("=" * 100)
@@ -129,6 +129,8 @@ def main():
                         help='Text to synthesize (can be used multiple times)')
     parser.add_argument('--output-dir', type=str, default='test_outputs/emotion_samples_api',
                         help='Output directory for generated samples')
+    parser.add_argument('--max-parallel', type=int, default=4,
+                        help='Maximum concurrent API requests (default: 4)')
     
     args = parser.parse_args()
     
@@ -147,7 +149,8 @@ def main():
     results = generate_emotion_samples(
         voice_reference=args.voice,
         texts=texts,
-        output_dir=args.output_dir
+        output_dir=args.output_dir,
+        max_parallel=args.max_parallel
     )
     
     sys.exit(0 if results else 1)
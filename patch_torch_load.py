@@ -1,28 +1,106 @@
 """
 Monkey patch to fix PyTorch 2.6+ weights_only issue with TTS models.
-This patches torch.load to use weights_only=False for TTS model loading.
+This registers the TTS config classes stored in XTTS checkpoints as safe globals,
+so torch.load can keep its weights_only=True path (a restricted unpickler that
+only rebuilds tensors and allow-listed types). Only a checkpoint that still
+references an unknown class is retried with weights_only=False.
+.pth/.bin checkpoints are memory-mapped (PyTorch 2.1+) so tensors are paged in
+on demand instead of read into RAM up front. This includes local files passed in
+as open file objects, as Coqui's load_fsspec does for the XTTS checkpoint.
 """
 
-import torch
 import functools
+import logging
+import os
+import pickle
+import re
+
+import torch
+
+logger = logging.getLogger(__name__)
 
 # Store original torch.load
 _original_torch_load = torch.load
 
+_safe_globals_registered = False
+
+# torch.load(mmap=True) exists from PyTorch 2.1
+_MMAP_SUPPORTED = tuple(int(part) for part in re.findall(r"\d+", torch.__version__)[:2]) >= (2, 1)
+_MMAP_SUFFIXES = ('.pth', '.bin')
+
+def register_tts_safe_globals():
+    """Allow-list the TTS classes pickled into XTTS checkpoints (attempted once, if TTS is installed)."""
+    global _safe_globals_registered
+    if _safe_globals_registered or not hasattr(torch.serialization, "add_safe_globals"):
+        return
+    _safe_globals_registered = True
+
+    safe_globals = []
+    try:
+        from TTS.tts.configs.xtts_config import XttsConfig
+        safe_globals.append(XttsConfig)
+        from TTS.tts.models.xtts import XttsArgs, XttsAudioConfig
+        safe_globals.extend([XttsArgs, XttsAudioConfig])
+        from TTS.config.shared_configs import BaseDatasetConfig
+        safe_globals.append(BaseDatasetConfig)
+    except ImportError:
+        pass
+    if safe_globals:
+        torch.serialization.add_safe_globals(safe_globals)
+
+def _local_checkpoint_path(f, start):
+    """Local .pth/.bin path behind f (a path or an unread file object), or None."""
+    if isinstance(f, (str, os.PathLike)):
+        path = f
+    elif start == 0:
+        # fsspec's LocalFileOpener exposes .path, builtin files .name
+        path = getattr(f, "path", None) or getattr(f, "name", None)
+        if not isinstance(path, (str, os.PathLike)) or not os.path.isfile(path):
+            return None
+    else:
+        return None
+    return path if os.fspath(path).endswith(_MMAP_SUFFIXES) else None
+
 @functools.wraps(_original_torch_load)
 def patched_torch_load(*args, **kwargs):
-    """Patched torch.load that defaults weights_only=False for TTS models."""
-    # If weights_only is not explicitly set, default to False for TTS compatibility
-    if 'weights_only' not in kwargs:
+    """Patched torch.load that falls back to weights_only=False only when a global is rejected."""
+    # TTS is imported before it loads a checkpoint, so by the first load its classes can be registered
+    register_tts_safe_globals()
+    f = args[0] if args else kwargs.get('f')
+    start = f.tell() if hasattr(f, 'seek') else None
+    if _MMAP_SUPPORTED and 'mmap' not in kwargs:
+        path = _local_checkpoint_path(f, start)
+        if path is not None:
+            # Map the file by path; an open file object can't be memory-mapped
+            mmap_args = (path,) + args[1:] if args else ()
+            mmap_kwargs = dict(kwargs, mmap=True)
+            if not args:
+                mmap_kwargs['f'] = path
+            try:
+                return patched_torch_load(*mmap_args, **mmap_kwargs)
+            except RuntimeError as e:
+                # Legacy (non-zip) checkpoints cannot be memory-mapped
+                if 'mmap' not in str(e):
+                    raise
+    try:
+        return _original_torch_load(*args, **kwargs)
+    except pickle.UnpicklingError as e:
+        if kwargs.get('weights_only') is False:
+            raise
+        # The message names the offending global ("Unsupported global: GLOBAL ...")
+        match = re.search(r"GLOBAL (\S+)", str(e))
+        unsafe = match.group(1) if match else "unknown"
+        logger.warning(f"torch.load rejected global {unsafe}, retrying with weights_only=False")
+        if start is not None:
+            f.seek(start)
         kwargs['weights_only'] = False
-    # If it's explicitly True, we still need to set it to False for TTS
-    elif kwargs.get('weights_only') is True:
-        kwargs['weights_only'] = False
-    
-    return _original_torch_load(*args, **kwargs)
+        return _original_torch_load(*args, **kwargs)
 
-# Apply the patch
-torch.load = patched_torch_load
+def patch_torch_load():
+    """Install the patched torch.load (idempotent; importing this module already does it)."""
+    torch.load = patched_torch_load
 
-print("✅ Patched torch.load to use weights_only=False for TTS compatibility")
+# Apply the patch
+patch_torch_load()
 
+print("✅ Patched torch.load to load TTS checkpoints with weights_only safe globals")
@@ -14,9 +14,9 @@ import time
 from pathlib import Path
 from datetime import datetime
 
-# Configure extensive logging
+# Configure logging (set TTS_LOG_LEVEL=DEBUG for per-file detail)
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get("TTS_LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s | %(levelname)-8s | [%(filename)s:%(lineno)d] | %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
@@ -40,7 +40,7 @@ def find_audio_samples(audio_dir="audio_samples"):
         return []
     
     # Look for audio files
-    audio_extensions = ['.wav', '.mp3', '.m4a', '.flac']
+    audio_extensions = ['.wav', '.mp3', '.m4a', '.opus', '.webm', '.flac']
     audio_files = []
     
     for ext in audio_extensions:
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Checks for the Numba audio kernels used by the emotion benchmark.
+Runs under pytest, or directly: python3 test_audio_kernels.py
+"""
+
+import numpy as np
+
+from audio_kernels import yin_pitch
+
+
+def test_yin_pitch_length_multiple_of_hop():
+    """The last centered frame starts at len(y); it must stay inside the padded buffer."""
+    sr = 16000
+    hop_length = 512
+    y = np.sin(2 * np.pi * 200.0 * np.arange(hop_length * 20) / sr)
+
+    # py_func runs without Numba, so an out-of-range read raises IndexError
+    f0, voiced = yin_pitch.py_func(y, sr, 65.0, 1000.0, 2048, hop_length)
+
+    assert len(f0) == len(voiced) == 1 + len(y) // hop_length
+    assert np.allclose(f0[voiced][2:-2], 200.0, rtol=0.01)
+
+
+if __name__ == "__main__":
+    test_yin_pitch_length_multiple_of_hop()
+    print("✅ audio kernel checks passed")
@@ -32,7 +32,7 @@ def find_audio_samples(audio_dir="audio_samples"):
         logger.error(f"❌ Audio directory not found: {audio_dir}")
         return []
     
-    audio_extensions = ['.wav', '.mp3', '.m4a', '.flac']
+    audio_extensions = ['.wav', '.mp3', '.m4a', '.opus', '.webm', '.flac']
     audio_files = []
     
     for ext in audio_extensions: